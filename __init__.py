@@ -22,6 +22,7 @@ from .modules.painteri2v_extend import PainterI2VExtend
 from .modules.painteri2v_advanced import PainterI2VAdvanced
 from .modules.paintersampler import PainterSampler
 from .modules.paintersampler_advanced import PainterSamplerAdvanced
+from .modules.painterlongvideo import PainterLongVideo, PainterStitchSegments
 
 
 class PainterAIOExtension(ComfyExtension):
@@ -34,6 +35,8 @@ class PainterAIOExtension(ComfyExtension):
             PainterI2VAdvanced,
             PainterSampler,
             PainterSamplerAdvanced,
+            PainterLongVideo,
+            PainterStitchSegments,
         ]
 
 
@@ -10,6 +10,7 @@ from .painteri2v_extend import PainterI2VExtend
 from .painteri2v_advanced import PainterI2VAdvanced
 from .paintersampler import PainterSampler
 from .paintersampler_advanced import PainterSamplerAdvanced
+from .painterlongvideo import PainterLongVideo, PainterStitchSegments
 
 __all__ = [
     # painteri2v (T2V/I2V/FLF2V unified)
@@ -22,4 +23,7 @@ __all__ = [
     "PainterSampler",
     # paintersampler_advanced
     "PainterSamplerAdvanced",
+    # painterlongvideo (streaming long-video orchestrator)
+    "PainterLongVideo",
+    "PainterStitchSegments",
 ]
@@ -5,8 +5,43 @@ from .utils import (
     apply_motion_amplitude,
     apply_color_protect,
     apply_frequency_separation,
+    apply_frequency_separation_linear,
+    extract_low_frequency,
     extract_reference_motion,
     merge_clip_vision_outputs,
+    encode_clip_vision,
     apply_clip_vision,
     get_svi_padding_latent,
+    svi_latents_mean,
+    SVILatent,
+    parse_amplitudes,
+)
+
+from .frames import (
+    center_crop_box,
+    center_crop_frames,
+    resize_frames,
+    gather_frames,
+)
+
+from .encode import (
+    GreyClip,
+    encode_pixels,
+    encode_grey_clip,
+    grey_latent_block,
+)
+
+from .cache import (
+    TensorLRUCache,
+    tensor_fingerprint,
+)
+
+from .planner import (
+    ExecutionPlan,
+    plan_execution,
+    dry_run,
+)
+
+from .postprocess import (
+    enhance_latent,
 )
@@ -0,0 +1,164 @@
+# modules/common/cache.py
+"""
+Content hashing and in-process caches for PainterAIO nodes.
+
+tensor_fingerprint() hashes shape, dtype and (a sample of) the bytes of a
+tensor, so results derived from the same frames can be found again without
+keeping the frames themselves around. TensorLRUCache keeps such results,
+evicting the least recently used entries once a byte budget is exceeded.
+
+Entries can also be dropped by owner: release_owner() marks a key element
+(e.g. the identity of a freed VAE) and every cache evicts the keys holding it
+on its next access.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import torch
+
+# Sampled fingerprints hash this many evenly spaced blocks of the flat tensor
+FINGERPRINT_BLOCKS = 64
+FINGERPRINT_BLOCK_BYTES = 4096
+
+
+def tensor_fingerprint(tensor: torch.Tensor, full: bool = False) -> str:
+    """
+    Content hash of a tensor.
+
+    Args:
+        tensor: Any tensor (any device/dtype)
+        full: Hash every byte. Default hashes FINGERPRINT_BLOCKS evenly spaced
+            blocks, which is enough to tell decoded frames or latents apart
+            and costs the same for a 10-frame and a 1000-frame video
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{tuple(tensor.shape)}|{tensor.dtype}".encode())
+
+    flat = tensor.detach().reshape(-1)
+    block = max(1, FINGERPRINT_BLOCK_BYTES // flat.element_size())
+    if not full and flat.numel() > FINGERPRINT_BLOCKS * block:
+        starts = torch.linspace(0, flat.numel() - block, FINGERPRINT_BLOCKS)
+        index = starts.long()[:, None] + torch.arange(block)[None, :]
+        flat = flat[index.reshape(-1).to(flat.device)]
+
+    digest.update(flat.cpu().contiguous().view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(v) for v in value)
+    if hasattr(value, "__dict__"):
+        return _nbytes(vars(value))
+    return 0
+
+
+# Key elements released by release_owner(), in release order
+_released_owners = []
+
+
+def release_owner(owner: str):
+    """
+    Evict every cached entry whose key tuple contains the string `owner`.
+
+    Eviction is deferred to each cache's next get/put, so this only appends to
+    a list and is safe to call from weakref finalizers (which can run while a
+    cache holds its lock).
+    """
+    _released_owners.append(owner)
+
+
+class TensorLRUCache:
+    """
+    Thread-safe LRU cache bounded by the total bytes of the cached tensors.
+
+    Values can be tensors or containers/objects holding tensors. Cached values
+    are shared, callers must treat them as read-only.
+
+    Args:
+        max_bytes: Byte budget; 0 disables caching
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._released_seen = len(_released_owners)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def _evict_released(self):
+        """Drop entries of owners released since the last access (holds lock)."""
+        end = len(_released_owners)
+        if self._released_seen == end:
+            return
+        owners = set(_released_owners[self._released_seen : end])
+        self._released_seen = end
+        for key in [k for k in self._entries if isinstance(k, tuple)]:
+            if any(isinstance(part, str) and part in owners for part in key):
+                self.bytes -= self._entries.pop(key)[1]
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._evict_released()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            self._evict_released()
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+# Content fingerprint modes exposed on nodes
+CONTENT_HASH_MODES = ("sampled", "full", "off")
+
+
+def frames_fingerprint(frames: torch.Tensor, mode: str = "sampled") -> str:
+    """
+    Fingerprint of IMAGE frames [T, H, W, C] under a content_hash mode.
+
+    "sampled" only samples videos. A single image is always hashed in full:
+    that is cheap, and a sampled hash could miss a small local edit (a
+    retouched face) and serve a stale encode.
+    """
+    full = mode == "full" or frames.ndim < 4 or frames.shape[0] == 1
+    return tensor_fingerprint(frames, full=full)
@@ -0,0 +1,63 @@
+# modules/common/concurrency.py
+"""
+Thread pool for CPU-side preparation that overlaps with VAE work.
+
+Conditioning nodes alternate between preparing pixels (resizing frames,
+rendering grey clips) and encoding them. Preparation is plain tensor work, and
+torch releases the GIL inside its kernels, so it can run on a worker thread
+while the calling thread waits on the VAE. VAE calls themselves always stay on
+the calling thread: ComfyUI's model management is not thread-safe.
+
+    pending = submit(threads, clip.render, start, end)
+    ...                        # encode something else meanwhile
+    pixels = pending.result()
+
+With threads = 0 the work runs inline and submit() returns a finished future,
+so callers have a single code path for serial and overlapped execution.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Default worker threads for node inputs (0 = serial)
+DEFAULT_PREP_THREADS = 2
+MAX_PREP_THREADS = 16
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def prep_executor(threads: int):
+    """Shared executor with `threads` workers, or None for serial execution."""
+    threads = min(int(threads), MAX_PREP_THREADS)
+    if threads <= 0:
+        return None
+    with _lock:
+        executor = _executors.get(threads)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=threads, thread_name_prefix="painter-prep"
+            )
+            _executors[threads] = executor
+        return executor
+
+
+def submit(threads: int, fn, *args, **kwargs) -> Future:
+    """
+    Run `fn(*args, **kwargs)` on the prep pool.
+
+    Returns:
+        Future of the result. With threads <= 0 `fn` runs right away and the
+        future is already finished; exceptions are re-raised by result()
+        either way.
+    """
+    executor = prep_executor(threads)
+    if executor is not None:
+        return executor.submit(fn, *args, **kwargs)
+
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
@@ -0,0 +1,80 @@
+# modules/common/early_exit.py
+"""
+Convergence-based early exit for the low-noise sampling phase.
+
+Distilled 4/8-step LoRAs often reach their result before the last steps; the
+remaining steps barely move the denoised prediction. EarlyExit wraps the
+sampler callback, tracks the relative L2 change of the denoised latent (x0)
+between steps, and once it stayed below `threshold` for `patience` steps
+stops the sampler and returns that x0, i.e. jumps straight to sigma 0.
+Only valid when the phase would end fully denoised (force_full_denoise).
+"""
+
+import logging
+
+import torch
+
+logger = logging.getLogger("ComfyUI-PainterAIO")
+
+
+class _Converged(Exception):
+    """Raised from the callback to stop the sampler loop."""
+
+
+class EarlyExit:
+    """
+    Sampler callback wrapper that stops sampling once x0 converged.
+
+    Args:
+        threshold: Relative L2 change ||x0_i - x0_{i-1}|| / ||x0_{i-1}|| below
+            which a step counts as converged (0 = never exit)
+        patience: Consecutive converged steps required before exiting
+        callback: Callback to forward every step to (previews, progress)
+    """
+
+    def __init__(self, threshold: float, patience: int = 1, callback=None):
+        self.threshold = threshold
+        self.patience = max(1, patience)
+        self.callback = callback
+        self.steps_run = 0
+        self.steps_saved = 0
+        self.x0 = None
+        self._calm = 0
+
+    def __call__(self, step, x0, x, total_steps):
+        if self.callback is not None:
+            self.callback(step, x0, x, total_steps)
+        self.steps_run = step + 1
+
+        if self.x0 is not None:
+            previous = torch.linalg.vector_norm(self.x0, dtype=torch.float32)
+            change = torch.linalg.vector_norm(x0 - self.x0, dtype=torch.float32)
+            change = (change / (previous + 1e-8)).item()
+            self._calm = self._calm + 1 if change < self.threshold else 0
+        self.x0 = x0
+
+        if self._calm >= self.patience and self.steps_run < total_steps:
+            self.steps_saved = total_steps - self.steps_run
+            raise _Converged()
+
+    def sample(self, sample_fn, model):
+        """
+        Run `sample_fn()` (comfy.sample.sample) with early exit.
+
+        Returns:
+            Samples as comfy.sample.sample() returns them: the sampler output,
+            or the converged x0 taken out of the model's latent space
+        """
+        try:
+            return sample_fn()
+        except _Converged:
+            # Deferred so the convergence logic imports without ComfyUI
+            import comfy.model_management as mm
+
+            logger.info(
+                f"Early exit after {self.steps_run} steps "
+                f"({self.steps_saved} saved, x0 change < {self.threshold} "
+                f"for {self.patience} steps)"
+            )
+            samples = model.model.process_latent_out(self.x0.to(torch.float32))
+            return samples.to(mm.intermediate_device())
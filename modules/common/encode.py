@@ -0,0 +1,457 @@
+# modules/common/encode.py
+"""
+Memory-aware VAE encoding for PainterAIO nodes.
+
+Width/height go up to 4096, where an untiled encode can run out of memory.
+encode_pixels() switches to ComfyUI's tiled encoder (overlapping tiles,
+feathered blending) when a tile size is set; untiled encodes rely on
+vae.encode(), which unloads other models first and retries tiled on OOM.
+"""
+
+import logging
+
+import torch
+import comfy.model_management as mm
+
+from .cache import TensorLRUCache, frames_fingerprint
+from .shm_cache import shared_cache, vae_identity
+from .concurrency import submit
+
+logger = logging.getLogger("ComfyUI-PainterAIO")
+
+DEFAULT_TILE_OVERLAP = 64
+
+# Tile sizes tried (largest first) when the planner estimates a tiled encode
+AUTO_TILE_SIZES = (1024, 768, 512, 384, 256)
+
+
+def _encode_shape(vae, pixels_shape) -> tuple:
+    """Shape the VAE sees for IMAGE pixels [T, H, W, C] (see comfy VAE.encode)."""
+    frames, height, width = pixels_shape[0], pixels_shape[1], pixels_shape[2]
+    if getattr(vae, "latent_dim", 2) == 3:
+        return (1, 3, frames, height, width)
+    return (frames, 3, height, width)
+
+
+def estimate_encode_bytes(vae, pixels_shape) -> int:
+    """
+    Estimate peak memory of vae.encode() for IMAGE pixels of the given shape.
+
+    Args:
+        vae: ComfyUI VAE
+        pixels_shape: IMAGE shape [T, H, W, C]
+
+    Returns:
+        Estimated bytes, as reported by the VAE's own memory model
+    """
+    return int(
+        vae.memory_used_encode(_encode_shape(vae, pixels_shape), vae.vae_dtype)
+    )
+
+
+def encode_pixels(
+    vae,
+    pixels: torch.Tensor,
+    tile_size: int = 0,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
+) -> torch.Tensor:
+    """
+    Encode IMAGE pixels, tiling spatially when asked to.
+
+    Args:
+        vae: ComfyUI VAE
+        pixels: Image tensor [T, H, W, 3]
+        tile_size: Tile size in pixels. 0 = untiled (vae.encode() frees memory
+            first and falls back to tiling on OOM), >0 = tile with this size
+        tile_overlap: Tile overlap in pixels, blended by the tiled encoder
+
+    Returns:
+        Latent tensor
+    """
+    if tile_size <= 0:
+        return vae.encode(pixels)
+
+    tile_overlap = max(0, min(tile_overlap, tile_size // 2))
+    logger.info(
+        f"VAE encode {tuple(pixels.shape)}: tiled {tile_size}px, "
+        f"overlap {tile_overlap}px"
+    )
+    return vae.encode_tiled(
+        pixels, tile_x=tile_size, tile_y=tile_size, overlap=tile_overlap
+    )
+
+
+# Extra latent groups of real frames encoded before each streamed chunk, so the
+# causal VAE has temporal context at chunk boundaries
+TEMPORAL_CONTEXT_GROUPS = 1
+
+# Fraction of free intermediate memory a fully materialized clip may use before
+# automatic chunking kicks in
+CLIP_MEMORY_FRACTION = 0.5
+
+
+class GreyClip:
+    """
+    Lazy description of a grey-padded conditioning clip.
+
+    "Grey everywhere, except frame k = X": frames are only rendered when a
+    range of them is requested, so a long clip never has to exist in memory
+    as one [length, H, W, 3] tensor.
+    """
+
+    def __init__(
+        self, length, height, width, device=None, dtype=torch.float32, fill=0.5
+    ):
+        self.length = length
+        self.height = height
+        self.width = width
+        self.device = mm.intermediate_device() if device is None else device
+        self.dtype = dtype
+        self.fill = fill
+        self.frames = {}
+        self._fingerprint = None
+        self._prefetched = None
+
+    def set_frame(self, index: int, frame: torch.Tensor):
+        """Override frame `index` with an image [1, H, W, 3] or [H, W, 3]."""
+        if frame.ndim == 4:
+            frame = frame[0]
+        self.frames[index % self.length] = frame
+        self._fingerprint = None
+
+    def fingerprint(self) -> str:
+        """Content hash of the clip description (geometry, fill, overrides)."""
+        if self._fingerprint is None:
+            parts = [
+                f"{self.length}x{self.height}x{self.width}|{self.dtype}|{self.fill}"
+            ]
+            for index in sorted(self.frames):
+                # Overrides are single frames, always hashed in full
+                parts.append(f"{index}:{frames_fingerprint(self.frames[index])}")
+            self._fingerprint = ";".join(parts)
+        return self._fingerprint
+
+    def prefetch(self, threads: int, chunk_frames: int = 0):
+        """
+        Start rendering the clip on the prep pool (see concurrency.submit).
+
+        Only done when encode_grey_clip() would encode the clip in one piece;
+        its render() then picks up the result. Set the frames first.
+        """
+        if threads > 0 and _full_encode(self, chunk_frames):
+            self._prefetched = submit(threads, self._render, 0, self.length)
+
+    def discard_prefetch(self):
+        """Drop a prefetched render that will not be used (e.g. a cache hit)."""
+        if self._prefetched is not None:
+            self._prefetched.cancel()
+            self._prefetched = None
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.height * self.width * 3 * self.dtype.itemsize
+
+    def render(self, start: int = 0, end: int = None) -> torch.Tensor:
+        """Render frames [start, end) as an IMAGE tensor."""
+        end = self.length if end is None else min(end, self.length)
+        if self._prefetched is not None and start == 0 and end == self.length:
+            pending, self._prefetched = self._prefetched, None
+            return pending.result()
+        return self._render(start, end)
+
+    def _render(self, start: int, end: int) -> torch.Tensor:
+        image = torch.full(
+            (end - start, self.height, self.width, 3),
+            self.fill,
+            device=self.device,
+            dtype=self.dtype,
+        )
+        for index, frame in self.frames.items():
+            if start <= index < end:
+                image[index - start] = frame.to(self.device, self.dtype)
+        return image
+
+
+def auto_chunk_frames(clip: GreyClip) -> int:
+    """
+    Pick a temporal chunk size for streaming a clip, or 0 for a full encode.
+
+    The full clip is kept when it fits comfortably in free intermediate memory;
+    otherwise the chunk is sized to the budget, aligned to the VAE's 4-frame
+    temporal compression.
+    """
+    budget = mm.get_free_memory(clip.device) * CLIP_MEMORY_FRACTION
+    if clip.length * clip.frame_bytes <= budget:
+        return 0
+    return max(4, int(budget // clip.frame_bytes) // 4 * 4)
+
+
+def _chunk_size(clip: GreyClip, chunk_frames: int) -> int:
+    if chunk_frames <= 0:
+        chunk_frames = auto_chunk_frames(clip)
+    return chunk_frames // 4 * 4
+
+
+def _full_encode(clip: GreyClip, chunk_frames: int) -> bool:
+    chunk_frames = _chunk_size(clip, chunk_frames)
+    return chunk_frames <= 0 or clip.length <= chunk_frames + 1
+
+
+def encode_grey_clip(
+    vae,
+    clip: GreyClip,
+    chunk_frames: int = 0,
+    tile_size: int = 0,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
+    start_latent: int = 0,
+    prep_threads: int = 0,
+) -> torch.Tensor:
+    """
+    Encode a grey-padded clip, streaming it through the VAE in temporal chunks.
+
+    Chunks are aligned to the 4-frame temporal compression: the first chunk
+    covers frames [0, 1 + chunk) and each later chunk covers `chunk` frames,
+    encoded together with one lead frame plus TEMPORAL_CONTEXT_GROUPS groups of
+    preceding frames whose latents are discarded. Only the latent output is
+    full-length in memory. Chunk boundaries see limited causal context, like
+    ComfyUI's temporal tiling, so chunked output is close to but not bitwise
+    equal to a full encode.
+
+    Args:
+        vae: ComfyUI VAE
+        clip: Clip description
+        chunk_frames: Pixel frames per chunk. 0 = automatic (full encode unless
+            the clip does not fit in memory)
+        tile_size: See encode_pixels()
+        tile_overlap: See encode_pixels()
+        start_latent: Skip the latents before this index (e.g. when the caller
+            already has them); encoding starts at their context frames
+        prep_threads: Render the next chunk on the prep pool while the
+            current one encodes (0 = serial). Holds two chunks of pixels
+
+    Returns:
+        Latent tensor [B, C, latent_t - start_latent, H, W]
+    """
+    full = _full_encode(clip, chunk_frames)
+    chunk_frames = _chunk_size(clip, chunk_frames)
+    if full and start_latent <= 0:
+        return encode_pixels(vae, clip.render(), tile_size, tile_overlap)
+    if full:
+        chunk_frames = clip.length
+
+    latent_t = ((clip.length - 1) // 4) + 1 - max(0, start_latent)
+    context = TEMPORAL_CONTEXT_GROUPS * 4
+    if chunk_frames < clip.length:
+        logger.info(
+            f"VAE encode {clip.length} frames: streamed in chunks of {chunk_frames}"
+        )
+
+    # (render start, render end, leading context latents to drop) per chunk
+    ranges = []
+    if start_latent <= 0:
+        start = chunk_frames + 1
+        ranges.append((0, start, 0))
+    else:
+        start = 4 * start_latent - 3
+    while start < clip.length:
+        end = min(start + chunk_frames, clip.length)
+        context_start = max(0, start - 1 - context)
+        ranges.append((context_start, end, 1 + (start - 1 - context_start) // 4))
+        start = end
+
+    out = None
+    filled = 0
+    pending = submit(prep_threads, clip.render, *ranges[0][:2]) if ranges else None
+    for i, (_, _, skip) in enumerate(ranges):
+        pixels = pending.result()
+        if i + 1 < len(ranges):
+            # Next chunk renders while this one encodes
+            pending = submit(prep_threads, clip.render, *ranges[i + 1][:2])
+        chunk_latent = encode_pixels(vae, pixels, tile_size, tile_overlap)[:, :, skip:]
+        del pixels
+
+        if out is None:
+            out = torch.empty(
+                (*chunk_latent.shape[:2], latent_t, *chunk_latent.shape[3:]),
+                dtype=chunk_latent.dtype,
+                device=chunk_latent.device,
+            )
+        count = min(chunk_latent.shape[2], latent_t - filled)
+        out[:, :, filled : filled + count] = chunk_latent[:, :, :count]
+        filled += count
+        del chunk_latent
+        if filled >= latent_t:
+            break
+
+    return out
+
+
+# Encoded latents by content fingerprint, so loop iterations that feed the
+# same frames again (as new tensor objects) skip the VAE
+ENCODE_CACHE_BYTES = 512 * 1024**2
+_encode_cache = TensorLRUCache(ENCODE_CACHE_BYTES)
+
+
+def _cached_encode(key, encode_fn) -> torch.Tensor:
+    latent = _encode_cache.get(key)
+    if latent is not None:
+        # Callers write into the result (e.g. end frame injection)
+        return latent.clone()
+
+    # Other workers on this host may have encoded it already (keys use
+    # vae_identity(), which is the same in every process)
+    shared = shared_cache()
+    if shared is not None:
+        latent = shared.get(key)
+        if latent is not None:
+            # The local cache keeps the copy-on-write view of the shared file;
+            # callers get their own copy like on every other path
+            latent = _encode_cache.put(key, latent.to(mm.intermediate_device()))
+            return latent.clone()
+
+    latent = _encode_cache.put(key, encode_fn())
+    if shared is not None:
+        shared.put(key, latent)
+    return latent.clone()
+
+
+def encode_pixels_cached(
+    vae,
+    pixels: torch.Tensor,
+    tile_size: int = 0,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
+    content_hash: str = "sampled",
+) -> torch.Tensor:
+    """
+    encode_pixels() with results cached by a content hash of `pixels`.
+
+    Args:
+        content_hash: "sampled", "full" (hash every byte) or "off" (no cache).
+            Single images are hashed in full either way
+    """
+    if content_hash == "off":
+        return encode_pixels(vae, pixels, tile_size, tile_overlap)
+    key = (
+        "pixels",
+        vae_identity(vae),
+        frames_fingerprint(pixels, content_hash),
+        tile_size,
+        tile_overlap,
+    )
+    return _cached_encode(
+        key, lambda: encode_pixels(vae, pixels, tile_size, tile_overlap)
+    )
+
+
+def _grey_clip_key(vae, clip: GreyClip, chunk_frames, tile_size, tile_overlap):
+    return (
+        "clip",
+        vae_identity(vae),
+        clip.fingerprint(),
+        chunk_frames,
+        tile_size,
+        tile_overlap,
+    )
+
+
+def prefetch_grey_clip(
+    vae,
+    clip: GreyClip,
+    chunk_frames: int = 0,
+    tile_size: int = 0,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
+    content_hash: str = "sampled",
+    prep_threads: int = 0,
+):
+    """
+    Start rendering `clip` on the prep pool unless its encode is cached.
+
+    Takes the arguments of the later encode_grey_clip_cached() call, so the
+    render overlaps the anchor encodes on a miss and is skipped on a hit.
+    """
+    if content_hash != "off":
+        key = _grey_clip_key(vae, clip, chunk_frames, tile_size, tile_overlap)
+        shared = shared_cache()
+        if key in _encode_cache or (shared is not None and key in shared):
+            return
+    clip.prefetch(prep_threads, chunk_frames)
+
+
+def encode_grey_clip_cached(
+    vae,
+    clip: GreyClip,
+    chunk_frames: int = 0,
+    tile_size: int = 0,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
+    content_hash: str = "sampled",
+    prep_threads: int = 0,
+) -> torch.Tensor:
+    """encode_grey_clip() with results cached by the clip's fingerprint."""
+
+    def encode():
+        return encode_grey_clip(
+            vae, clip, chunk_frames, tile_size, tile_overlap, prep_threads=prep_threads
+        )
+
+    try:
+        if content_hash == "off":
+            return encode()
+        key = _grey_clip_key(vae, clip, chunk_frames, tile_size, tile_overlap)
+        return _cached_encode(key, encode)
+    finally:
+        # A hit never renders the clip; do not keep a prefetched one alive
+        clip.discard_prefetch()
+
+
+# Encoded all-grey clip of the last (vae, height, width), released with the VAE.
+# The VAE is causal, so the first k latents of a longer grey clip are the
+# latents of a shorter one.
+GREY_CACHE_BYTES = 512 * 1024**2
+_GREY_LATENTS = TensorLRUCache(GREY_CACHE_BYTES)
+
+
+def grey_latent_block(vae, latent_frames: int, height: int, width: int):
+    """
+    Latents of an all-grey clip covering `latent_frames` latent frames.
+
+    Encoded once per VAE and resolution (re-encoded only when a longer block
+    is requested) and sliced afterwards. Treat the result as read-only.
+    """
+    key = (vae_identity(vae), height, width)
+    cached = _GREY_LATENTS.get(key)
+    if cached is None or cached.shape[2] < latent_frames:
+        length = 4 * (latent_frames - 1) + 1
+        clip = GreyClip(length, height, width)
+        cached = encode_grey_clip(vae, clip)
+        _GREY_LATENTS.clear()
+        _GREY_LATENTS.put(key, cached)
+    return cached[:, :, :latent_frames]
+
+
+# Extra latent frames decoded ahead of a requested tail, so the causal decoder
+# has temporal context for the frames that are kept
+DECODE_CONTEXT_LATENTS = 1
+
+
+def decode_frames(vae, samples: torch.Tensor) -> torch.Tensor:
+    """Decode latents to IMAGE frames [N, H, W, C] (video batches flattened)."""
+    images = vae.decode(samples)
+    if images.ndim == 5:
+        images = images.reshape(-1, *images.shape[-3:])
+    return images
+
+
+def decode_tail_frames(vae, samples: torch.Tensor, frames: int) -> torch.Tensor:
+    """
+    Decode only the latent frames needed to recover the last `frames` frames.
+
+    Args:
+        vae: ComfyUI VAE
+        samples: Video latent [1, C, T, H, W]
+        frames: Number of trailing pixel frames needed
+
+    Returns:
+        IMAGE tensor whose last `frames` frames match the clip's tail
+    """
+    latent_count = -(-frames // 4) + 1 + DECODE_CONTEXT_LATENTS
+    return decode_frames(vae, samples[:, :, -min(latent_count, samples.shape[2]) :])
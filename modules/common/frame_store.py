@@ -0,0 +1,399 @@
+# modules/common/frame_store.py
+"""
+On-disk frame store for long video outputs.
+
+A store is a directory of chunked .npy shards plus a JSON index:
+
+    index.json          {"version", "height", "width", "channels", "dtype",
+                         "frames", "next_shard", "shards": [...]}
+    shard_00000.npy     [N, H, W, C] uint8 or float16
+    shard_00001.npy     ...
+
+Frames are appended through FrameStoreWriter, which only ever holds the shard
+being filled in memory, so writing a video costs memory proportional to the
+shard size rather than the video length. A store can be reopened for appending
+and its last frames popped back out (pop_tail), which is what the segment
+stitcher uses to blend overlaps without rewriting the video.
+
+Shard files are copy-on-write: they are never modified once written. Popping
+flushed frames writes the kept part of a shard to a new file, publishes an
+index with a bumped version and only then removes the superseded files, so a
+reader either sees its own snapshot or fails loudly (see FrameStore).
+
+FrameStore is the read side: a lightweight handle that indexes like an IMAGE
+tensor [T, H, W, C] and reads frames on demand through numpy.memmap, so
+previous_video[-overlap_frames] costs one page-in instead of the whole video.
+"""
+
+import json
+import os
+
+import numpy as np
+import torch
+from comfy_api.latest import io
+
+INDEX_NAME = "index.json"
+DEFAULT_SHARD_FRAMES = 64
+STORE_DTYPES = ("uint8", "float16")
+
+
+def read_index(path: str) -> dict:
+    with open(os.path.join(path, INDEX_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _superseded(shards: list, kept: list) -> list:
+    """Files of `shards` that no entry of `kept` refers to."""
+    kept_files = {shard["file"] for shard in kept}
+    return [shard["file"] for shard in shards if shard["file"] not in kept_files]
+
+
+def frames_to_numpy(frames: torch.Tensor, dtype: str) -> np.ndarray:
+    """Convert IMAGE frames [N, H, W, C] (0..1 float) to the store dtype."""
+    frames = frames.detach().cpu()
+    if dtype == "uint8":
+        return (frames.clamp(0, 1) * 255).round().to(torch.uint8).numpy()
+    return frames.to(torch.float16).numpy()
+
+
+class FrameStoreWriter:
+    """
+    Append-only writer for a frame store directory.
+
+    Args:
+        path: Store directory (created if missing)
+        height, width, channels: Frame geometry
+        dtype: "uint8" (4x smaller) or "float16"
+        shard_frames: Frames per shard file
+    """
+
+    def __init__(
+        self,
+        path: str,
+        height: int,
+        width: int,
+        channels: int = 3,
+        dtype: str = "uint8",
+        shard_frames: int = DEFAULT_SHARD_FRAMES,
+    ):
+        if dtype not in STORE_DTYPES:
+            raise ValueError(f"Unsupported frame store dtype: {dtype}")
+
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.height = height
+        self.width = width
+        self.channels = channels
+        self.dtype = dtype
+        self.shard_frames = shard_frames
+
+        self.version = 1
+        self.frames = 0
+        self.shards = []
+        self.next_shard = 0
+        self._buffer = np.empty(
+            (shard_frames, height, width, channels), dtype=np.dtype(dtype)
+        )
+        self._buffered = 0
+
+    @classmethod
+    def reopen(
+        cls,
+        path: str,
+        shard_frames: int = DEFAULT_SHARD_FRAMES,
+        store: "FrameStore" = None,
+    ):
+        """
+        Open an existing store for appending after its last frame.
+
+        With `store` set the writer continues from that handle's snapshot
+        instead of the current index, so appending through an older handle
+        (e.g. a re-executed node) drops whatever was written after it. Raises
+        RuntimeError if the handle's shards are gone.
+        """
+        index = read_index(path)
+        writer = cls(
+            path,
+            index["height"],
+            index["width"],
+            channels=index["channels"],
+            dtype=index["dtype"],
+            shard_frames=shard_frames,
+        )
+        writer.version = index.get("version", 1)
+        writer.frames = index["frames"]
+        writer.shards = index["shards"]
+        writer.next_shard = index.get("next_shard", len(index["shards"]))
+
+        if store is not None and store.shards != writer.shards:
+            for shard_idx in range(len(store.shards)):
+                store.check_shard(shard_idx)
+            superseded = _superseded(writer.shards, store.shards)
+            writer.frames = store.frames
+            writer.shards = [dict(shard) for shard in store.shards]
+            writer._publish(superseded)
+        return writer
+
+    @property
+    def total_frames(self) -> int:
+        """Frames written so far, including the shard still being filled."""
+        return self.frames + self._buffered
+
+    def append(self, frames: torch.Tensor):
+        """Append IMAGE frames [N, H, W, C]."""
+        data = frames_to_numpy(frames[..., : self.channels], self.dtype)
+        offset = 0
+        while offset < data.shape[0]:
+            # Flush lazily so the latest frames stay in the buffer for pop_tail
+            if self._buffered == self.shard_frames:
+                self._flush()
+            count = min(self.shard_frames - self._buffered, data.shape[0] - offset)
+            self._buffer[self._buffered : self._buffered + count] = data[
+                offset : offset + count
+            ]
+            self._buffered += count
+            offset += count
+
+    def pop_tail(self, count: int) -> torch.Tensor:
+        """
+        Remove the last `count` frames and return them as IMAGE float32.
+
+        Frames still in the shard buffer are taken from memory; only frames that
+        were already flushed cost a rewrite of (at most) the last shard they
+        touch, written to a new file (copy-on-write).
+        """
+        count = min(count, self.total_frames)
+        if count <= 0:
+            return torch.empty((0, self.height, self.width, self.channels))
+
+        parts = []
+        remaining = count
+        superseded = []
+
+        take = min(remaining, self._buffered)
+        if take > 0:
+            parts.append(self._buffer[self._buffered - take : self._buffered].copy())
+            self._buffered -= take
+            remaining -= take
+
+        while remaining > 0:
+            shard = self.shards[-1]
+            shard_path = os.path.join(self.path, shard["file"])
+            data = np.load(shard_path, mmap_mode="r")
+            take = min(remaining, shard["count"])
+            parts.append(data[shard["count"] - take : shard["count"]].copy())
+
+            self.shards.pop()
+            superseded.append(shard["file"])
+            if take < shard["count"]:
+                kept = shard["count"] - take
+                name = self._save_shard(data[:kept])
+                self.shards.append(
+                    {"file": name, "start": shard["start"], "count": kept}
+                )
+            self.frames -= take
+            remaining -= take
+            del data
+
+        if superseded:
+            self._publish(superseded)
+
+        frames = torch.from_numpy(np.concatenate(parts[::-1], axis=0))
+        if self.dtype == "uint8":
+            return frames.to(torch.float32) / 255.0
+        return frames.to(torch.float32)
+
+    def _save_shard(self, data: np.ndarray) -> str:
+        """Write frames to a new shard file; existing files are never reused."""
+        name = f"shard_{self.next_shard:05d}.npy"
+        self.next_shard += 1
+        np.save(os.path.join(self.path, name), data)
+        return name
+
+    def _flush(self):
+        if self._buffered == 0:
+            return
+        name = self._save_shard(self._buffer[: self._buffered])
+        self.shards.append(
+            {"file": name, "start": self.frames, "count": self._buffered}
+        )
+        self.frames += self._buffered
+        self._buffered = 0
+        self._write_index()
+
+    def _publish(self, superseded: list):
+        """
+        Publish an index that rewrote stored frames, then drop the old shards.
+
+        The version bump tells open handles their snapshot is gone. Removal can
+        fail where mapped files are locked (Windows); the files are then left
+        behind unreferenced.
+        """
+        self.version += 1
+        self._write_index()
+        for name in superseded:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+    def _write_index(self):
+        index = {
+            "version": self.version,
+            "height": self.height,
+            "width": self.width,
+            "channels": self.channels,
+            "dtype": self.dtype,
+            "frames": self.frames,
+            "next_shard": self.next_shard,
+            "shards": self.shards,
+        }
+        tmp_path = os.path.join(self.path, INDEX_NAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.path, INDEX_NAME))
+
+    def close(self):
+        """Flush the last partial shard and write the final index."""
+        self._flush()
+        self._write_index()
+
+
+class FrameStore:
+    """
+    Read-only handle to a frame store directory.
+
+    Indexes like an IMAGE tensor: store.shape, store[i], store[a:b],
+    store[a:b, :, :, :3] all work and return float32 tensors in 0..1 holding
+    only the requested frames. Shards are memory-mapped lazily on first access.
+
+    A handle is a snapshot of the index it was opened with. Appends leave it
+    valid; when its frames were rewritten since (a newer index version no longer
+    lists a shard it maps), reads raise RuntimeError instead of returning frames
+    of another version.
+    """
+
+    def __init__(self, path: str):
+        index = read_index(path)
+
+        self.path = path
+        self.version = index.get("version", 1)
+        self.height = index["height"]
+        self.width = index["width"]
+        self.channels = index["channels"]
+        self.dtype = index["dtype"]
+        self.frames = index["frames"]
+        self.shards = index["shards"]
+        self._maps = {}
+
+    @property
+    def shape(self) -> tuple:
+        return (self.frames, self.height, self.width, self.channels)
+
+    @property
+    def ndim(self) -> int:
+        return 4
+
+    def __len__(self) -> int:
+        return self.frames
+
+    def __repr__(self) -> str:
+        return f"FrameStore({self.path!r}, shape={self.shape}, dtype={self.dtype})"
+
+    def _changed(self, version: int) -> RuntimeError:
+        return RuntimeError(
+            f"Frame store {self.path} was rewritten (version {self.version} -> "
+            f"{version}) after this handle was opened; re-run the node that "
+            "produced it"
+        )
+
+    def check_shard(self, shard_idx: int):
+        """Raise RuntimeError if shard `shard_idx` is no longer in the store."""
+        shard = self.shards[shard_idx]
+        index = read_index(self.path)
+        version = index.get("version", 1)
+        if version != self.version and shard not in index["shards"]:
+            raise self._changed(version)
+
+    def _shard(self, shard_idx: int) -> np.ndarray:
+        if shard_idx not in self._maps:
+            self.check_shard(shard_idx)
+            shard = self.shards[shard_idx]
+            shard_path = os.path.join(self.path, shard["file"])
+            data = None
+            if os.path.exists(shard_path):
+                # Copy-on-write map: writable views for torch, file never modified
+                data = np.load(shard_path, mmap_mode="c")
+            if data is None or data.shape[0] != shard["count"]:
+                raise self._changed(read_index(self.path).get("version", 1))
+            self._maps[shard_idx] = data
+        return self._maps[shard_idx]
+
+    def _locate(self, frame: int) -> tuple:
+        """Shard index and offset of a frame (shards are in frame order)."""
+        lo, hi = 0, len(self.shards) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.shards[mid]["start"] <= frame:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo, frame - self.shards[lo]["start"]
+
+    def raw(self, start: int, end: int) -> torch.Tensor:
+        """
+        Frames [start, end) in the store dtype (uint8 / float16).
+
+        Zero-copy view of the memory map when the range lies in one shard.
+        """
+        parts = []
+        frame = start
+        while frame < end:
+            shard_idx, offset = self._locate(frame)
+            count = min(end - frame, self.shards[shard_idx]["count"] - offset)
+            parts.append(
+                torch.from_numpy(self._shard(shard_idx)[offset : offset + count])
+            )
+            frame += count
+
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return torch.empty(
+                (0, self.height, self.width, self.channels),
+                dtype=getattr(torch, self.dtype),
+            )
+        return torch.cat(parts, dim=0)
+
+    def read(self, start: int, end: int) -> torch.Tensor:
+        """Frames [start, end) as IMAGE float32 in 0..1."""
+        frames = self.raw(start, end)
+        if self.dtype == "uint8":
+            return frames.to(torch.float32) / 255.0
+        return frames.to(torch.float32)
+
+    def __getitem__(self, key) -> torch.Tensor:
+        rest = ()
+        if isinstance(key, tuple):
+            key, rest = key[0], key[1:]
+
+        if isinstance(key, slice):
+            start, end, step = key.indices(self.frames)
+            indices = range(start, end, step)
+            if step == 1 or not indices:
+                frames = self.read(start, max(start, end))
+            else:
+                frames = torch.cat([self.read(i, i + 1) for i in indices], dim=0)
+            return frames[(slice(None),) + rest] if rest else frames
+
+        index = int(key)
+        if index < 0:
+            index += self.frames
+        if not 0 <= index < self.frames:
+            raise IndexError(f"Frame {key} out of range for {self.frames} frames")
+        frame = self.read(index, index + 1)[0]
+        return frame[rest] if rest else frame
+
+
+# Node socket type for FrameStore handles
+FrameStoreType = io.Custom("PAINTER_FRAME_STORE")
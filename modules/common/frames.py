@@ -0,0 +1,177 @@
+# modules/common/frames.py
+"""
+Shared frame preprocessing for PainterAIO nodes.
+
+Conditioning nodes only ever need a handful of single frames (start, end,
+anchor, overlap start/middle ...) at the target resolution. Nodes describe the
+frames they need and gather_frames() resizes them in one batched call per
+source resolution instead of one common_upscale call per frame.
+
+Resizing matches comfy.utils.common_upscale(..., "bilinear", "center") but
+crops in source coordinates before anything is copied or resampled.
+"""
+
+import torch
+import torch.nn.functional as F
+
+# Downscale factor from which the optional antialiased path switches to area
+AREA_DOWNSCALE_FACTOR = 2
+
+
+def center_crop_box(
+    src_height: int,
+    src_width: int,
+    width: int,
+    height: int,
+) -> tuple:
+    """
+    Compute the center crop (in source pixels) matching the target aspect ratio.
+
+    Same rounding as comfy.utils.common_upscale(..., "center"), so cropping
+    first and resizing the crop gives the same result as the full path.
+
+    Returns:
+        (y, x, crop_height, crop_width)
+    """
+    old_aspect = src_width / src_height
+    new_aspect = width / height
+    x = 0
+    y = 0
+    if old_aspect > new_aspect:
+        x = round((src_width - src_width * (new_aspect / old_aspect)) / 2)
+    elif old_aspect < new_aspect:
+        y = round((src_height - src_height * (old_aspect / new_aspect)) / 2)
+
+    return y, x, src_height - y * 2, src_width - x * 2
+
+
+def center_crop_frames(
+    frames: torch.Tensor,
+    width: int,
+    height: int,
+) -> torch.Tensor:
+    """
+    Crop IMAGE frames [N, H, W, C] to the target aspect ratio (view, no copy).
+    """
+    y, x, crop_h, crop_w = center_crop_box(
+        frames.shape[1], frames.shape[2], width, height
+    )
+    return frames[:, y : y + crop_h, x : x + crop_w]
+
+
+def resize_frames(
+    frames: torch.Tensor,
+    width: int,
+    height: int,
+    antialias: bool = False,
+) -> torch.Tensor:
+    """
+    Resize IMAGE frames to the target size (bilinear, center crop).
+
+    The crop is taken in source coordinates first, so only the kept region is
+    resampled.
+
+    Args:
+        frames: Image tensor [N, H, W, C]
+        width: Target width
+        height: Target height
+        antialias: Use area resampling for large (>= 2x) downscales instead of
+            bilinear, which aliases on e.g. 4K stills
+
+    Returns:
+        Resized tensor [N, height, width, C]. The input itself (no copy) when it
+        already matches the target size.
+    """
+    if frames.shape[1] == height and frames.shape[2] == width:
+        return frames
+
+    cropped = center_crop_frames(frames, width, height)
+    return _resample(cropped, width, height, antialias)
+
+
+def _resample(
+    cropped: torch.Tensor,
+    width: int,
+    height: int,
+    antialias: bool,
+) -> torch.Tensor:
+    """Resample already-cropped [N, H, W, C] frames to the target size."""
+    mode = "bilinear"
+    if (
+        antialias
+        and cropped.shape[1] >= height * AREA_DOWNSCALE_FACTOR
+        and cropped.shape[2] >= width * AREA_DOWNSCALE_FACTOR
+    ):
+        mode = "area"
+
+    return F.interpolate(
+        cropped.movedim(-1, 1), size=(height, width), mode=mode
+    ).movedim(1, -1)
+
+
+def gather_frames(
+    picks: dict,
+    width: int,
+    height: int,
+    antialias: bool = False,
+) -> dict:
+    """
+    Collect single frames from any number of sources and resize them together.
+
+    Frames are grouped by source resolution so each group needs only one
+    resize call. Each frame is center-cropped before batching, so large
+    sources only copy the region that survives the crop. Frames already at the
+    target size are returned as views of their source, and picking the same
+    frame twice resizes it only once.
+
+    Args:
+        picks: Mapping name -> (source [T, H, W, C], frame index) or None
+        width: Target width
+        height: Target height
+        antialias: See resize_frames()
+
+    Returns:
+        Mapping name -> frame tensor [1, height, width, 3] (None entries stay None).
+        Returned tensors are views; copy before modifying them in place.
+    """
+    out = {}
+    groups = {}
+    seen = {}
+
+    for name, pick in picks.items():
+        if pick is None:
+            out[name] = None
+            continue
+
+        source, index = pick
+        index = index % source.shape[0]
+
+        # Same frame requested under several names
+        source_key = (id(source), index)
+        if source_key in seen:
+            seen[source_key].append(name)
+            continue
+        seen[source_key] = [name]
+
+        frame = source[index : index + 1, :, :, :3]
+        if frame.shape[1] == height and frame.shape[2] == width:
+            out[name] = frame
+            continue
+
+        group_key = (frame.shape[1], frame.shape[2], frame.dtype, frame.device)
+        frame = center_crop_frames(frame, width, height)
+        groups.setdefault(group_key, []).append((source_key, frame))
+
+    # One resize per source resolution (frames are already cropped)
+    for members in groups.values():
+        batch = torch.cat([frame for _, frame in members], dim=0)
+        resized = _resample(batch, width, height, antialias)
+        for i, (source_key, _) in enumerate(members):
+            out[seen[source_key][0]] = resized[i : i + 1]
+
+    # Fill aliases
+    for names in seen.values():
+        for name in names[1:]:
+            out[name] = out[names[0]]
+
+    return out
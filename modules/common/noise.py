@@ -0,0 +1,67 @@
+# modules/common/noise.py
+"""
+Seed-keyed noise cache for the dual-phase samplers.
+
+comfy.sample.prepare_noise() seeds a CPU generator and draws a full-size
+noise tensor on every run, which is slow for long high-resolution clips.
+The result only depends on seed, shape, dtype, layout and batch_index, so
+cfg/step sweeps on the same latent can share one draw. Cache hits return a
+clone of the first draw and are bit-identical to fresh generation.
+
+prepare_noise() draws from the global CPU generator, so after a miss the RNG
+is seeded with `seed` and advanced past the draw. Ancestral/SDE samplers keep
+drawing from it during sampling, so the RNG state after the draw (CPU, plus
+CUDA when initialized) is cached with the noise and restored on a hit.
+"""
+
+import torch
+import comfy.sample
+
+from .cache import TensorLRUCache
+
+NOISE_CACHE_BYTES = 1024**3
+_noise_cache = TensorLRUCache(NOISE_CACHE_BYTES)
+
+
+def _rng_state() -> tuple:
+    cuda = torch.cuda.get_rng_state_all() if torch.cuda.is_initialized() else None
+    return torch.get_rng_state(), cuda
+
+
+def _restore_rng_state(seed: int, state: tuple):
+    cpu, cuda = state
+    # Also seeds CUDA devices initialized later, as prepare_noise() does
+    torch.manual_seed(seed)
+    if cuda is not None:
+        torch.cuda.set_rng_state_all(cuda)
+    torch.set_rng_state(cpu)
+
+
+def prepare_noise_cached(latent_image: torch.Tensor, seed: int, batch_inds=None):
+    """
+    comfy.sample.prepare_noise() with results cached by seed and geometry.
+
+    Args:
+        latent_image: Latent samples (only shape/dtype/layout are used)
+        seed: Noise seed
+        batch_inds: latent["batch_index"] or None
+
+    Returns:
+        Noise tensor (a private copy, safe to modify)
+    """
+    key = (
+        int(seed),
+        tuple(latent_image.shape),
+        latent_image.dtype,
+        latent_image.layout,
+        None if batch_inds is None else tuple(int(i) for i in batch_inds),
+    )
+    cached = _noise_cache.get(key)
+    if cached is None:
+        noise = comfy.sample.prepare_noise(latent_image, seed, batch_inds)
+        _noise_cache.put(key, (noise, _rng_state()))
+    else:
+        noise, state = cached
+        _restore_rng_state(seed, state)
+    return noise.clone()
+
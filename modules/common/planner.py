@@ -0,0 +1,299 @@
+# modules/common/planner.py
+"""
+Memory-budget planner for the PainterAIO conditioning nodes.
+
+Estimates the peak bytes of each stage of a node's execute() for a given
+width/height/length/batch_size and picks the cheapest execution path that fits
+the memory reported by comfy.model_management:
+
+- full:     materialize the whole grey clip, untiled VAE encode
+- tiled:    spatially tiled VAE encode (encode_pixels, user tile size)
+- fp16:     pixel buffers in half precision
+- chunked:  temporally streamed grey clip (encode_grey_clip)
+
+The device side is planned against total device memory, not free memory:
+vae.encode() unloads other models before encoding and falls back to tiling on
+OOM, so an untiled encode is only reported as infeasible when even the
+smallest tile cannot fit.
+
+plan_execution() is what the nodes call; dry_run() returns the same plan as a
+plain dict without needing a loaded VAE, so jobs can be rejected at submission
+time.
+"""
+
+import logging
+from dataclasses import dataclass, field, asdict
+
+import torch
+import comfy.model_management as mm
+
+from .encode import (
+    AUTO_TILE_SIZES,
+    CLIP_MEMORY_FRACTION,
+    DEFAULT_TILE_OVERLAP,
+    TEMPORAL_CONTEXT_GROUPS,
+    estimate_encode_bytes,
+)
+
+logger = logging.getLogger("ComfyUI-PainterAIO")
+
+# Wan 2.1 VAE encode memory model (bytes per output pixel, bf16), used when
+# planning without a loaded VAE
+DEFAULT_ENCODE_BYTES_PER_PIXEL = 6000 * 2
+DEFAULT_LATENT_CHANNELS = 16
+DEFAULT_SPACIAL_SCALE = 8
+
+# Per-node shape of the work: single frames gathered, grey clips encoded,
+# concat latents kept alive (enhanced + original + temporaries per clip)
+NODE_PROFILES = {
+    "PainterI2V": {"frames": 2, "clips": 1, "latent_copies": 4},
+    "PainterI2VExtend": {"frames": 4, "clips": 1, "latent_copies": 4},
+    "PainterI2VAdvanced": {"frames": 4, "clips": 2, "latent_copies": 4},
+}
+
+PRECISION_BYTES = {"fp32": 4, "fp16": 2, "bf16": 2}
+PRECISION_DTYPES = {
+    "fp32": torch.float32,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+}
+PRECISIONS = tuple(PRECISION_DTYPES)
+
+
+@dataclass
+class ExecutionPlan:
+    """Chosen execution path and the estimates behind it."""
+
+    node_id: str
+    strategy: str
+    chunk_frames: int = 0
+    tile_size: int = 0
+    anchor_tile_size: int = 0
+    tile_overlap: int = DEFAULT_TILE_OVERLAP
+    pixel_precision: str = "fp32"
+    precision: str = "fp32"
+    stages: dict = field(default_factory=dict)
+    peak_intermediate: int = 0
+    peak_device: int = 0
+    free_intermediate: int = 0
+    device_budget: int = 0
+    feasible: bool = True
+    reason: str = ""
+
+    @property
+    def pixel_dtype(self) -> torch.dtype:
+        return PRECISION_DTYPES[self.pixel_precision]
+
+    @property
+    def latent_dtype(self) -> torch.dtype:
+        """dtype of the conditioning latents (concat / reference latents)."""
+        return PRECISION_DTYPES[self.precision]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        mb = 1024**2
+        return (
+            f"{self.node_id}: {self.strategy} "
+            f"(chunk={self.chunk_frames}, tile={self.tile_size}, "
+            f"pixels={self.pixel_precision}, latents={self.precision}) "
+            f"intermediate {self.peak_intermediate / mb:.0f}MB"
+            f"/{self.free_intermediate / mb:.0f}MB, "
+            f"device {self.peak_device / mb:.0f}MB/{self.device_budget / mb:.0f}MB"
+        )
+
+
+def _encode_bytes(vae, frames, height, width) -> int:
+    if vae is not None:
+        return estimate_encode_bytes(vae, (frames, height, width, 3))
+    return DEFAULT_ENCODE_BYTES_PER_PIXEL * height * width
+
+
+def _pick_tile(vae, frames, height, width, device_budget) -> int:
+    for tile in AUTO_TILE_SIZES:
+        if tile >= max(height, width):
+            continue
+        tile_bytes = _encode_bytes(vae, frames, min(tile, height), min(tile, width))
+        if tile_bytes <= device_budget:
+            return tile
+    return 0
+
+
+def _device_budget(device, vae=None) -> int:
+    """
+    Device memory a VAE encode can count on.
+
+    Total memory minus what vae.encode() cannot evict: ComfyUI's reserved
+    memory and the VAE's own weights. Other models are unloaded on demand.
+    """
+    budget = mm.get_total_memory(device) - mm.extra_reserved_memory()
+    model = getattr(vae, "first_stage_model", None)
+    if model is not None:
+        budget -= mm.module_size(model)
+    return int(max(0, budget))
+
+
+def plan_execution(
+    node_id: str,
+    width: int,
+    height: int,
+    length: int,
+    batch_size: int = 1,
+    svi_mode: bool = False,
+    vae=None,
+    tile_size: int = 0,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
+    chunk_frames: int = 0,
+    precision: str = "fp32",
+    free_intermediate: int = None,
+    device_budget: int = None,
+) -> ExecutionPlan:
+    """
+    Estimate per-stage peak memory and choose an execution strategy.
+
+    Args:
+        node_id: Node the plan is for (key of NODE_PROFILES)
+        width, height, length, batch_size: Node inputs
+        svi_mode: SVI mode (no grey clip is encoded)
+        vae: Loaded VAE, or None to use the Wan 2.1 memory model
+        tile_size: User override (>0 tiles clip encodes with this size; single
+            frames are only tiled when one frame does not fit on its own)
+        tile_overlap: Tile overlap in pixels
+        chunk_frames: User override (>0 forces streaming with this chunk size)
+        precision: Conditioning precision ("fp32", "fp16", "bf16"); reduced
+            precision also applies to the pixel buffers
+        free_intermediate: Free intermediate memory in bytes (default: queried)
+        device_budget: VAE device memory in bytes (default: total memory minus
+            reserved memory and the VAE's weights)
+
+    Returns:
+        ExecutionPlan
+    """
+    profile = NODE_PROFILES[node_id]
+
+    if free_intermediate is None:
+        free_intermediate = int(mm.get_free_memory(mm.intermediate_device()))
+    if device_budget is None:
+        device = vae.device if vae is not None else mm.get_torch_device()
+        device_budget = _device_budget(device, vae)
+
+    if vae is not None:
+        latent_channels = vae.latent_channels
+        spacial_scale = vae.spacial_compression_encode()
+    else:
+        latent_channels = DEFAULT_LATENT_CHANNELS
+        spacial_scale = DEFAULT_SPACIAL_SCALE
+
+    latent_t = ((length - 1) // 4) + 1
+    latent_h = height // spacial_scale
+    latent_w = width // spacial_scale
+    latent_frame = latent_channels * latent_h * latent_w
+    pixel_frame = height * width * 3
+
+    plan = ExecutionPlan(
+        node_id=node_id,
+        strategy="full",
+        tile_overlap=tile_overlap,
+        pixel_precision=precision,
+        precision=precision,
+        free_intermediate=free_intermediate,
+        device_budget=device_budget,
+    )
+
+    # === Encode (device side) ===
+    # Only the user's tile size is applied. An untiled encode that does not
+    # fit is left to vae.encode(), whose OOM fallback tiles it
+    plan.tile_size = max(0, tile_size)
+    if plan.tile_size > 0 and _encode_bytes(vae, 1, height, width) > device_budget:
+        plan.anchor_tile_size = plan.tile_size
+
+    tile = plan.tile_size
+    encode_full = _encode_bytes(vae, length, height, width)
+    if tile == 0 and encode_full > device_budget:
+        tile = _pick_tile(vae, length, height, width, device_budget)
+        if tile == 0:
+            plan.feasible = False
+            plan.reason = "VAE encode does not fit even with the smallest tile"
+        else:
+            plan.reason = "untiled encode exceeds device memory, vae.encode() tiles"
+    if tile > 0:
+        plan.peak_device = _encode_bytes(
+            vae, length, min(tile, height), min(tile, width)
+        )
+    else:
+        plan.peak_device = encode_full
+
+    # === Fixed intermediate costs ===
+    latent_bytes = PRECISION_BYTES[precision]
+    stages = {
+        "frames": profile["frames"] * pixel_frame * 4,
+        "concat_latents": profile["clips"]
+        * profile["latent_copies"]
+        * latent_frame
+        * latent_t
+        * latent_bytes,
+        "output_latent": batch_size * latent_frame * latent_t * 4,
+    }
+    fixed = sum(stages.values())
+
+    # === Grey clip (intermediate side) ===
+    clip_frames = 0 if svi_mode else length
+    budget = free_intermediate * CLIP_MEMORY_FRACTION - fixed
+
+    if clip_frames > 0:
+        context = 1 + TEMPORAL_CONTEXT_GROUPS * 4
+        if chunk_frames > 0:
+            plan.chunk_frames = chunk_frames // 4 * 4
+        elif clip_frames * pixel_frame * PRECISION_BYTES[precision] > budget:
+            # Half-precision pixels first, then stream if that is not enough
+            if precision == "fp32":
+                plan.pixel_precision = "fp16"
+            per_frame = pixel_frame * 2
+            if clip_frames * per_frame > budget:
+                fit_frames = int(budget // per_frame) - context
+                plan.chunk_frames = max(4, fit_frames // 4 * 4)
+
+        bytes_per_pixel = PRECISION_BYTES[plan.pixel_precision]
+        rendered = clip_frames
+        if 0 < plan.chunk_frames < clip_frames - 1:
+            rendered = plan.chunk_frames + context
+        stages["grey_clip"] = rendered * pixel_frame * bytes_per_pixel
+
+    plan.stages = stages
+    plan.peak_intermediate = sum(stages.values())
+
+    parts = []
+    if plan.chunk_frames > 0:
+        parts.append("chunked")
+    if plan.tile_size > 0:
+        parts.append("tiled")
+    if plan.pixel_precision != "fp32":
+        parts.append(plan.pixel_precision)
+    plan.strategy = "+".join(parts) or "full"
+
+    if plan.peak_intermediate > free_intermediate:
+        reason = "intermediate memory exceeded at minimum chunk"
+        plan.reason = plan.reason if not plan.feasible else reason
+        plan.feasible = False
+
+    return plan
+
+
+def dry_run(node_id: str, **params) -> dict:
+    """
+    Plan a node execution without running it.
+
+    Takes the node's width/height/length/batch_size/svi_mode plus the optional
+    overrides of plan_execution(). Returns the plan as a dict; check
+    result["feasible"] to reject a job before queueing it.
+    """
+    return plan_execution(node_id, **params).to_dict()
+
+
+def log_plan(plan: ExecutionPlan):
+    if plan.feasible:
+        note = f": {plan.reason}" if plan.reason else ""
+        logger.info(f"Plan {plan.summary()}{note}")
+    else:
+        logger.warning(f"Plan {plan.summary()}: {plan.reason}")
@@ -0,0 +1,301 @@
+# modules/common/postprocess.py
+"""
+Fused latent post-processing chain for PainterAIO nodes.
+
+Every conditioning node runs a prefix of
+
+    motion amplitude -> frequency separation -> color protect
+
+on its concat latent. enhance_latent() runs the whole chain as one call with
+one of three engines:
+
+- eager:   the reference functions from utils, one after another
+- fused:   one output buffer updated in place; statistics are derived from
+           the input instead of from full-size temporaries, and the
+           data-dependent branches are written branch-free
+- compile: the fused chain through one torch.compile'd callable with the
+           frame/height/width dims marked dynamic, so changing
+           resolution/length reuses the graph; falls back to "fused" where
+           compile is unavailable
+"""
+
+import logging
+
+import torch
+
+from .utils import (
+    DEFAULT_FREQUENCY_CUTOFF,
+    apply_motion_amplitude,
+    apply_frequency_separation,
+    apply_frequency_separation_linear,
+    apply_color_protect,
+    extract_low_frequency,
+    linear_high_frequency,
+)
+
+logger = logging.getLogger("ComfyUI-PainterAIO")
+
+ENGINES = ("eager", "fused", "compile")
+
+# apply_color_protect defaults
+DRIFT_THRESHOLD = 0.18
+BRIGHTNESS_THRESHOLD = 0.92
+
+
+def _fused_chain(
+    latent: torch.Tensor,
+    baseline,
+    amplitude: torch.Tensor,
+    boost: torch.Tensor,
+    strength: torch.Tensor,
+    flags: tuple,
+) -> torch.Tensor:
+    """
+    Hand-fused motion amplitude -> frequency separation -> color protect.
+
+    `flags` holds everything that changes the graph (which stages run, anchor
+    side, brightness protection, latent channels, low-pass engine and cutoff).
+    The float parameters are [N, 1, 1, 1, 1] tensors, so new slider values
+    reuse a compiled graph and N > 1 enhances a batch-1 latent into N samples
+    (amplitude sweep).
+    """
+    (
+        do_amplitude,
+        do_frequency,
+        do_color,
+        base_first,
+        protect,
+        channels,
+        freq_engine,
+        freq_cutoff,
+    ) = flags
+    f32 = torch.float32
+    batch = max(amplitude.shape[0], latent.shape[0])
+
+    # Per-sample stage gates of the reference functions: amplitude <= 1 and
+    # boost <= 0.001 leave their sample unchanged
+    amplitude = torch.where(amplitude > 1.0, amplitude, torch.ones_like(amplitude))
+    boost = boost * (boost > 0.001)
+
+    if do_color:
+        # Per-channel means of the unenhanced latent; their mean is the
+        # per-sample brightness, so the original is never read again
+        orig_mean = latent.mean(dim=(2, 3, 4), dtype=f32)
+
+    out = None
+    if do_amplitude:
+        out = latent.expand(batch, -1, -1, -1, -1).clone()
+        if base_first:
+            base, other = out[:, :, :1], out[:, :, 1:]
+        else:
+            base, other = out[:, :, -1:], out[:, :, :-1]
+
+        # base + (other - base - m) * a + m
+        #   = a * other + (1 - a) * base + (1 - a) * m
+        keep = (1.0 - amplitude).to(out.dtype)
+        other.mul_(amplitude.to(out.dtype)).add_(base * keep)
+        if protect:
+            # mean(other - base) without materializing the difference
+            diff_mean = latent[:, :, 1:] if base_first else latent[:, :, :-1]
+            diff_mean = diff_mean.mean(dim=(1, 3, 4), keepdim=True, dtype=f32)
+            base_orig = latent[:, :, :1] if base_first else latent[:, :, -1:]
+            diff_mean -= base_orig.mean(dim=(1, 3, 4), keepdim=True, dtype=f32)
+            other.add_((diff_mean * (1.0 - amplitude)).to(out.dtype))
+        other.clamp_(-6, 6)
+
+    if do_frequency:
+        # out + boost * high_pass(out - baseline), one temporary. Without the
+        # amplitude stage the high-pass is shared by every sample.
+        source = latent if out is None else out
+        if isinstance(baseline, tuple):
+            diff = linear_high_frequency(
+                source, *baseline, channels, freq_engine, freq_cutoff
+            )
+        else:
+            diff = source - baseline
+            diff.sub_(
+                extract_low_frequency(diff, channels, freq_engine, freq_cutoff)
+            )
+        if out is None:
+            out = torch.addcmul(latent, diff, boost.to(latent.dtype))
+        else:
+            out.addcmul_(diff, boost.to(out.dtype))
+        del diff
+
+    if out is None:
+        out = latent.expand(batch, -1, -1, -1, -1).clone()
+
+    if do_color:
+        enhanced_mean = out.mean(dim=(2, 3, 4), dtype=f32)
+        drift = enhanced_mean - orig_mean
+        problem = drift.abs() / (orig_mean.abs() + 1e-6) > DRIFT_THRESHOLD
+        correction = drift * problem * strength.view(-1, 1) * 0.03
+        correction = correction.to(out.dtype)[:, :, None, None, None]
+        out.sub_(correction * (out > 0))
+
+        orig_brightness = orig_mean.mean(dim=1)
+        enhanced_brightness = out.mean(dim=(1, 2, 3, 4), dtype=f32)
+        brightness_boost = torch.where(
+            enhanced_brightness < orig_brightness * BRIGHTNESS_THRESHOLD,
+            torch.clamp(orig_brightness / (enhanced_brightness + 1e-6), max=1.05),
+            torch.ones_like(enhanced_brightness),
+        )
+        brightness_boost = brightness_boost.to(out.dtype).view(-1, 1, 1, 1, 1)
+        out.mul_(1 + (brightness_boost - 1) * (out < 0.5))
+        out.clamp_(-6, 6)
+
+    return out
+
+
+def _values(value) -> list:
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+# torch.compile(_fused_chain), created on first use; False once compilation
+# failed or torch.compile is unavailable. Dynamo keys its graphs on the flags
+# and dtypes itself, so one callable serves every chain
+_compiled = None
+
+# T, H, W of the latent and of a full-size baseline
+DYNAMIC_DIMS = (2, 3, 4)
+
+
+def _compiled_chain():
+    global _compiled
+    if _compiled is None:
+        _compiled = (
+            torch.compile(_fused_chain, dynamic=True)
+            if hasattr(torch, "compile")
+            else False
+        )
+    return _compiled or None
+
+
+def _compile_failed(error: Exception):
+    global _compiled
+    logger.warning(f"torch.compile failed, using fused chain: {error}")
+    _compiled = False
+
+
+def _mark_dynamic(tensor: torch.Tensor):
+    """Compile T/H/W symbolically (size-1 dims are always specialized)."""
+    for dim in DYNAMIC_DIMS:
+        if tensor.shape[dim] > 1:
+            torch._dynamo.mark_dynamic(tensor, dim)
+
+
+def enhance_latent(
+    latent: torch.Tensor,
+    amplitude=1.0,
+    base_frame_idx: int = 0,
+    protect_brightness: bool = True,
+    baseline: torch.Tensor = None,
+    boost_scale=0.0,
+    latent_channels: int = 16,
+    freq_engine: str = "interpolate",
+    freq_cutoff: float = DEFAULT_FREQUENCY_CUTOFF,
+    color_protect: bool = False,
+    correct_strength: float = 0.01,
+    engine: str = "eager",
+) -> torch.Tensor:
+    """
+    Run the motion amplitude -> frequency separation -> color protect chain.
+
+    Each stage runs under the same conditions as its utils function: motion
+    amplitude when amplitude > 1, frequency separation when a baseline is
+    given and boost_scale > 0.001, color protect when enabled and
+    correct_strength > 0 (against the latent as passed in).
+
+    amplitude and boost_scale may be lists: a batch-1 latent is then enhanced
+    once per value and the samples are returned stacked along the batch dim
+    (amplitude sweep), all in one vectorized pass.
+
+    Args:
+        latent: Concat latent [B, C, T, H, W] (not modified)
+        amplitude, base_frame_idx, protect_brightness: See apply_motion_amplitude()
+        baseline, boost_scale, latent_channels, freq_engine, freq_cutoff:
+            See apply_frequency_separation() (engine, cutoff). `baseline`
+            may also be a (start_latent, end_latent) pair for the FLF2V
+            linear baseline, which is then never materialized
+        color_protect, correct_strength: See apply_color_protect()
+        engine: "eager", "fused" or "compile"
+
+    Returns:
+        Enhanced latent tensor
+    """
+    sweep = isinstance(amplitude, (list, tuple)) or isinstance(
+        boost_scale, (list, tuple)
+    )
+    do_amplitude = max(_values(amplitude)) > 1.0
+    do_frequency = baseline is not None and max(_values(boost_scale)) > 0.001
+    do_color = color_protect and correct_strength > 0
+    if not (do_amplitude or do_frequency or do_color) and not sweep:
+        return latent
+
+    amplitude, boost_scale = torch.broadcast_tensors(
+        torch.tensor(_values(amplitude), dtype=torch.float32, device=latent.device),
+        torch.tensor(_values(boost_scale), dtype=torch.float32, device=latent.device),
+    )
+    if not sweep:
+        amplitude, boost_scale = amplitude.item(), boost_scale.item()
+
+    if engine == "eager":
+        result = latent
+        if do_amplitude:
+            result = apply_motion_amplitude(
+                result, base_frame_idx, amplitude, protect_brightness
+            )
+        if do_frequency and isinstance(baseline, tuple):
+            result = apply_frequency_separation_linear(
+                result,
+                *baseline,
+                boost_scale,
+                latent_channels,
+                engine=freq_engine,
+                cutoff=freq_cutoff,
+            )
+        elif do_frequency:
+            result = apply_frequency_separation(
+                result,
+                baseline,
+                boost_scale,
+                latent_channels,
+                engine=freq_engine,
+                cutoff=freq_cutoff,
+            )
+        if do_color:
+            result = apply_color_protect(result, latent, correct_strength)
+        if sweep and result.shape[0] < amplitude.shape[0]:
+            result = result.expand(amplitude.shape[0], -1, -1, -1, -1).clone()
+        return result
+
+    flags = (
+        do_amplitude,
+        do_frequency,
+        do_color,
+        base_frame_idx == 0,
+        protect_brightness,
+        latent_channels,
+        freq_engine,
+        float(freq_cutoff),
+    )
+    params = [
+        torch.as_tensor(value, dtype=torch.float32, device=latent.device).reshape(
+            -1, 1, 1, 1, 1
+        )
+        for value in (amplitude, boost_scale, correct_strength)
+    ]
+    params[2] = params[2].expand_as(params[0])
+
+    if engine == "compile":
+        compiled = _compiled_chain()
+        if compiled is not None:
+            try:
+                for tensor in (latent, *_values(baseline)):
+                    if isinstance(tensor, torch.Tensor):
+                        _mark_dynamic(tensor)
+                return compiled(latent, baseline, *params, flags)
+            except Exception as e:
+                _compile_failed(e)
+
+    return _fused_chain(latent, baseline, *params, flags)
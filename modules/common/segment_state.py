@@ -0,0 +1,112 @@
+# modules/common/segment_state.py
+"""
+Segment state carried between loop iterations of PainterI2VAdvanced.
+
+A loop iteration encodes the anchor (start_image), derives the continuation
+tail from its previous input and picks up a CLIP vision output. SegmentState
+keeps those results together with the geometry they were computed for. Each
+reused tensor is keyed by the content fingerprint of the input it came from;
+a state whose geometry does not match is ignored.
+
+What the next iteration actually reuses:
+
+- the anchor latent and clip_vision, whenever start_image is unchanged or
+  dropped; this is the saving of a chained loop
+- the tail latent only when the same previous input arrives again (e.g. an
+  iteration re-run with other settings). A chained iteration continues from a
+  segment sampled and decoded after this node ran, which it never sees, so its
+  tail is always encoded anew
+"""
+
+import logging
+from dataclasses import dataclass
+
+import torch
+from comfy_api.latest import io
+
+from .cache import frames_fingerprint, tensor_fingerprint
+
+logger = logging.getLogger("ComfyUI-PainterAIO")
+
+
+@dataclass(repr=False)
+class SegmentState:
+    """Reusable results of one PainterI2VAdvanced run."""
+
+    width: int
+    height: int
+    latent_channels: int
+    dtype: torch.dtype
+    svi_mode: bool = False
+    # Encoded start_image (anchor / reference_latent) and its source key
+    reference_latent: torch.Tensor = None
+    reference_key: str = ""
+    # Tail latent of this run's previous input and its key (not the tail of
+    # the segment sampled from this run's conditioning)
+    tail_latent: torch.Tensor = None
+    tail_key: str = ""
+    clip_vision: object = None
+
+    def __repr__(self) -> str:
+        # Geometry and content keys only; never prints tensors
+        return (
+            f"SegmentState({self.width}x{self.height}, {self.dtype}, "
+            f"svi={self.svi_mode}, ref={self.reference_key}, "
+            f"tail={self.tail_key}, clip_vision={id(self.clip_vision)})"
+        )
+
+    def matches(self, width, height, latent_channels, dtype, svi_mode) -> bool:
+        return (
+            self.width == width
+            and self.height == height
+            and self.latent_channels == latent_channels
+            and self.dtype == dtype
+            and self.svi_mode == svi_mode
+        )
+
+    def reference_for(self, key: str):
+        """Cached reference latent for an input with content key `key`."""
+        if self.reference_latent is not None and key and key == self.reference_key:
+            return self.reference_latent
+        return None
+
+    def tail_for(self, key: str):
+        """Cached tail latent for a previous input with content key `key`."""
+        if self.tail_latent is not None and key and key == self.tail_key:
+            return self.tail_latent
+        return None
+
+
+def content_key(value, mode: str = "sampled") -> str:
+    """
+    Key of a tensor input for SegmentState lookups.
+
+    Returns "" for a missing input and for mode "off"; an empty key never
+    matches, so with "off" only a missing start_image reuses the state.
+    """
+    if isinstance(value, dict) and "samples" in value:
+        if mode == "off":
+            return ""
+        return tensor_fingerprint(value["samples"], full=mode == "full")
+    if value is None or mode == "off":
+        return ""
+    if not isinstance(value, torch.Tensor):
+        return f"{getattr(value, 'path', id(value))}:{len(value)}"
+    return frames_fingerprint(value, mode)
+
+
+def usable_state(state, width, height, latent_channels, dtype, svi_mode):
+    """Return `state` if it was computed for this geometry, else None."""
+    if state is None:
+        return None
+    if not state.matches(width, height, latent_channels, dtype, svi_mode):
+        logger.info(
+            f"Segment state is for {state.width}x{state.height} "
+            f"({state.dtype}, svi_mode={state.svi_mode}), recomputing"
+        )
+        return None
+    return state
+
+
+# Node socket type for SegmentState
+SegmentStateType = io.Custom("PAINTER_SEGMENT_STATE")
@@ -0,0 +1,237 @@
+# modules/common/shm_cache.py
+"""
+Cross-process latent cache in shared memory (/dev/shm).
+
+Several ComfyUI workers on one host encode the same anchors. With
+PAINTER_SHM_CACHE set, encoded latents are also published to a directory in
+shared memory, so one worker's encode serves all of them:
+
+- one file per latent, named by a hash of its content key
+- a small JSON index (bytes, shape, dtype, last use) guarded by an fcntl lock
+- LRU eviction by total bytes across all workers
+- readers map the file copy-on-write, so a hit is a zero-copy tensor view
+
+Environment:
+    PAINTER_SHM_CACHE: Cache directory, or "1" for /dev/shm/painter-aio.
+        Unset (default) disables the backend
+    PAINTER_SHM_CACHE_BYTES: Byte budget shared by all workers (default 2 GiB)
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+import weakref
+from contextlib import contextmanager
+
+import torch
+
+from .cache import release_owner, tensor_fingerprint
+
+try:
+    import fcntl
+except ImportError:  # Windows: no shared index lock, backend stays off
+    fcntl = None
+
+logger = logging.getLogger("ComfyUI-PainterAIO")
+
+DEFAULT_SHM_DIR = "/dev/shm/painter-aio"
+DEFAULT_SHM_BYTES = 2 * 1024**3
+
+_DTYPES = {
+    str(dtype): dtype
+    for dtype in (torch.float32, torch.float16, torch.bfloat16, torch.float64)
+}
+
+
+class SharedLatentCache:
+    """
+    Latent cache shared by all processes that open the same directory.
+
+    Args:
+        root: Directory for entries and index (created if missing)
+        max_bytes: Total byte budget of all entries
+    """
+
+    INDEX = "index.json"
+    LOCK = "index.lock"
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_SHM_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def hash_key(key) -> str:
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    def _entry_path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.bin")
+
+    @contextmanager
+    def _locked_index(self):
+        """Exclusive access to the index; yields it and writes it back."""
+        with open(os.path.join(self.root, self.LOCK), "a+") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                path = os.path.join(self.root, self.INDEX)
+                try:
+                    with open(path) as f:
+                        index = json.load(f)
+                except (OSError, ValueError):
+                    index = {}
+                yield index
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(index, f)
+                os.replace(tmp, path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __contains__(self, key) -> bool:
+        """Lock-free presence check (the entry may be evicted right after)."""
+        return os.path.exists(self._entry_path(self.hash_key(key)))
+
+    def get(self, key):
+        """Zero-copy, copy-on-write view of a cached latent, or None."""
+        name = self.hash_key(key)
+        with self._locked_index() as index:
+            entry = index.get(name)
+            if entry is None:
+                return None
+            entry["used"] = time.time()
+
+        nbytes, shape, dtype = entry["bytes"], entry["shape"], entry["dtype"]
+        try:
+            data = torch.from_file(
+                self._entry_path(name), shared=False, size=nbytes, dtype=torch.uint8
+            )
+        except (OSError, RuntimeError):
+            # Evicted between the index read and the map
+            return None
+        return data.view(_DTYPES[dtype]).reshape(shape)
+
+    def put(self, key, latent: torch.Tensor):
+        """Publish a latent; evicts least recently used entries to fit."""
+        if str(latent.dtype) not in _DTYPES:
+            return
+        # uint8 view: bf16 has no numpy/file dtype, bytes round-trip exactly
+        data = latent.detach().cpu().contiguous().reshape(-1).view(torch.uint8)
+        nbytes = data.numel()
+        if nbytes > self.max_bytes:
+            return
+
+        name = self.hash_key(key)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(memoryview(data.numpy()))
+        os.replace(tmp, self._entry_path(name))
+
+        with self._locked_index() as index:
+            index[name] = {
+                "bytes": nbytes,
+                "shape": list(latent.shape),
+                "dtype": str(latent.dtype),
+                "used": time.time(),
+            }
+            total = sum(entry["bytes"] for entry in index.values())
+            for old in sorted(index, key=lambda n: index[n]["used"]):
+                if total <= self.max_bytes:
+                    break
+                if old == name:
+                    continue
+                total -= index.pop(old)["bytes"]
+                # Open mappings stay valid after unlink
+                try:
+                    os.remove(self._entry_path(old))
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._locked_index() as index:
+            for name in list(index):
+                try:
+                    os.remove(self._entry_path(name))
+                except OSError:
+                    pass
+            index.clear()
+
+
+_vae_counter = itertools.count()
+
+
+def vae_identity(vae) -> str:
+    """
+    Cache-key identity of a VAE, memoized on the VAE.
+
+    With only the in-process caches in use this is a per-object token: free
+    to compute, and a weakref finalizer releases the VAE's cache entries when
+    it is garbage collected. With the shared cache enabled the key has to be
+    the same in every worker (id() differs between them), so it is a content
+    hash of the model's state dict: each tensor's name, shape and dtype plus a
+    sample of its bytes (tensors up to 256 KB are hashed in full), so
+    fine-tunes that only differ in a few layers still get distinct keys.
+    """
+    identity = getattr(vae, "_painter_identity", None)
+    if identity is not None:
+        return identity
+
+    identity = None
+    if shared_cache() is None:
+        identity = f"vae-{id(vae):x}-{next(_vae_counter)}"
+        try:
+            weakref.finalize(vae, release_owner, identity)
+        except TypeError:  # not weak-referenceable
+            identity = None
+    if identity is None:
+        identity = _vae_content_hash(vae)
+    try:
+        vae._painter_identity = identity
+    except AttributeError:
+        pass
+    return identity
+
+
+def _vae_content_hash(vae) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    channels = getattr(vae, "latent_channels", "")
+    digest.update(f"{type(vae).__name__}|{channels}".encode())
+    model = getattr(vae, "first_stage_model", None)
+    if model is None:
+        digest.update(str(id(vae)).encode())
+        return digest.hexdigest()
+    for name, tensor in model.state_dict().items():
+        digest.update(f"|{name}|{tensor_fingerprint(tensor)}".encode())
+    return digest.hexdigest()
+
+
+_shared_cache = None
+_shared_cache_checked = False
+
+
+def shared_cache():
+    """The process-wide SharedLatentCache, or None when not enabled."""
+    global _shared_cache, _shared_cache_checked
+    if _shared_cache_checked:
+        return _shared_cache
+    _shared_cache_checked = True
+
+    root = os.environ.get("PAINTER_SHM_CACHE", "")
+    if not root or root == "0":
+        return None
+    if fcntl is None:
+        logger.warning("PAINTER_SHM_CACHE needs fcntl (Linux/macOS), disabled")
+        return None
+    if root == "1":
+        root = DEFAULT_SHM_DIR
+    max_bytes = int(os.environ.get("PAINTER_SHM_CACHE_BYTES", DEFAULT_SHM_BYTES))
+    try:
+        _shared_cache = SharedLatentCache(root, max_bytes)
+    except OSError as e:
+        logger.warning(f"Shared latent cache at {root} unavailable: {e}")
+        return None
+    logger.info(f"Shared latent cache at {root} ({max_bytes / 1024**2:.0f} MB)")
+    return _shared_cache
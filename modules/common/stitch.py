@@ -0,0 +1,69 @@
+# modules/common/stitch.py
+"""
+Incremental stitching of extension segments into a frame store.
+
+A continuation segment starts by re-generating the tail of the previous one
+(overlap_frames + 1 frames in continuity mode). Concatenating whole videos per
+segment copies the accumulated output every time; the stitcher instead appends
+each segment to a FrameStoreWriter and resolves the overlap at the seam:
+
+- trim:      drop the repeated leading frames of the new segment
+- crossfade: additionally blend the last `blend_frames` frames already written
+             with the matching frames of the new segment
+
+Only the seam frames are touched, so stitching costs one copy per output frame.
+"""
+
+import torch
+
+from .frame_store import FrameStoreWriter
+
+STITCH_MODES = ("trim", "crossfade")
+
+
+def crossfade_weights(count: int, device=None) -> torch.Tensor:
+    """Weights of the incoming segment across a seam of `count` frames."""
+    weights = torch.arange(1, count + 1, device=device, dtype=torch.float32)
+    return (weights / (count + 1)).view(-1, 1, 1, 1)
+
+
+class SegmentStitcher:
+    """
+    Appends segments to a frame store, trimming or cross-fading the overlap.
+
+    Args:
+        writer: Store to append to (may already contain frames)
+        trim: Leading frames of each new segment that repeat the stored tail;
+            new[trim - 1] lines up with the last stored frame
+        blend_frames: Frames cross-faded at each seam (0 = hard cut). Clamped
+            to `trim`
+    """
+
+    def __init__(self, writer: FrameStoreWriter, trim: int, blend_frames: int = 0):
+        self.writer = writer
+        self.trim = trim
+        self.blend_frames = max(0, min(blend_frames, trim))
+
+    @property
+    def frames(self) -> int:
+        return self.writer.total_frames
+
+    def append(self, frames: torch.Tensor):
+        """Append a decoded segment IMAGE [T, H, W, C]."""
+        if self.writer.total_frames == 0:
+            self.writer.append(frames)
+            return
+
+        blend = min(self.blend_frames, self.writer.total_frames)
+        if blend > 0:
+            # Stored tail[j] and new[trim - blend + j] show the same moment
+            tail = self.writer.pop_tail(blend)
+            incoming = frames[self.trim - blend : self.trim, :, :, : tail.shape[-1]]
+            weights = crossfade_weights(blend)
+            tail.mul_(1.0 - weights).add_(incoming.to(tail) * weights)
+            self.writer.append(tail)
+
+        self.writer.append(frames[self.trim :])
+
+    def close(self):
+        self.writer.close()
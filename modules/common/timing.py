@@ -0,0 +1,138 @@
+# modules/common/timing.py
+"""
+Per-phase sampling throughput for the dual-phase samplers.
+
+PhaseTimer wraps a phase's sampler callback and timestamps every step, which
+gives per-step latency, it/s and a running ETA without an external profiler.
+SamplingStats collects the phases of one run into a summary record that is
+logged, returned as a JSON string and optionally appended to a JSON lines
+file in the output directory, so a queue of jobs leaves step-level throughput
+data behind.
+"""
+
+import json
+import logging
+import os
+import time
+
+import folder_paths
+
+logger = logging.getLogger("ComfyUI-PainterAIO")
+
+
+def output_stats_path(stats_file: str) -> str:
+    """
+    Resolve a stats_file input against ComfyUI's output directory.
+
+    Relative paths are taken from the output directory; anything that resolves
+    outside of it (absolute paths, "..", symlinks) raises ValueError, like
+    saving images does. "" (no file) is returned unchanged.
+    """
+    if not stats_file:
+        return ""
+    output_dir = os.path.realpath(folder_paths.get_output_directory())
+    path = os.path.realpath(os.path.join(output_dir, stats_file))
+    if os.path.commonpath((output_dir, path)) != output_dir:
+        raise ValueError(
+            f"stats_file must be inside the output directory: {stats_file!r}"
+        )
+    return path
+
+
+class PhaseTimer:
+    """
+    Sampler callback wrapper that records step timestamps of one phase.
+
+    Args:
+        name: Phase name ("high" / "low")
+        callback: Callback to forward every step to (previews, progress)
+    """
+
+    def __init__(self, name: str, callback=None):
+        self.name = name
+        self.callback = callback
+        self.started = None
+        self.finished = None
+        self.stamps = []
+        self.total_steps = 0
+        self.eta = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def __call__(self, step, x0, x, total_steps):
+        self.stamps.append(time.perf_counter())
+        self.total_steps = total_steps
+        done = len(self.stamps)
+        self.eta = (self.stamps[-1] - self.started) / done * (total_steps - done)
+        logger.debug(
+            f"{self.name} step {step + 1}/{total_steps}: "
+            f"{self.it_per_s:.2f} it/s, ETA {self.eta:.1f}s"
+        )
+        if self.callback is not None:
+            self.callback(step, x0, x, total_steps)
+
+    @property
+    def step_seconds(self) -> list:
+        previous = [self.started] + self.stamps[:-1]
+        return [stamp - prev for stamp, prev in zip(self.stamps, previous)]
+
+    @property
+    def it_per_s(self) -> float:
+        if not self.stamps:
+            return 0.0
+        return len(self.stamps) / max(self.stamps[-1] - self.started, 1e-9)
+
+    def summary(self, **extra) -> dict:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        steps = self.step_seconds
+        return {
+            "phase": self.name,
+            "steps": len(steps),
+            "total_steps": self.total_steps,
+            "seconds": round(end - self.started, 4),
+            "it_per_s": round(self.it_per_s, 4),
+            "step_ms": [round(s * 1000, 2) for s in steps],
+            "step_ms_mean": round(sum(steps) / len(steps) * 1000, 2) if steps else 0,
+            **extra,
+        }
+
+
+class SamplingStats:
+    """
+    Summary of one sampler run.
+
+    Args:
+        node_id: Node that ran the phases
+        **info: Run parameters recorded with the summary (steps, shape, ...)
+    """
+
+    def __init__(self, node_id: str, **info):
+        self.record = {"node": node_id, "time": time.time(), **info, "phases": []}
+        self.started = time.perf_counter()
+
+    def add(self, timer: PhaseTimer, **extra):
+        self.record["phases"].append(timer.summary(**extra))
+
+    def finish(self, path: str = "") -> str:
+        """Log the summary, append it to `path` (JSON lines) if set; returns JSON."""
+        self.record["seconds"] = round(time.perf_counter() - self.started, 4)
+        phases = ", ".join(
+            f"{p['phase']} {p['steps']} steps {p['seconds']:.2f}s "
+            f"({p['it_per_s']:.2f} it/s)"
+            for p in self.record["phases"]
+        )
+        logger.info(f"{self.record['node']}: {self.record['seconds']:.2f}s, {phases}")
+
+        line = json.dumps(self.record)
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "a") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.warning(f"Could not write sampling stats to {path}: {e}")
+        return line
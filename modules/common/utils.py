@@ -4,19 +4,62 @@ Shared utility functions for PainterAIO nodes.
 Extracted from PainterI2V, PainterLongVideo, and Wan22FMLF for reusability.
 """
 
+import functools
+
 import torch
 import torch.nn.functional as F
-import comfy.utils
 import comfy.clip_vision
 import comfy.latent_formats
 import comfy.model_management as mm
 import node_helpers
 
+from .cache import TensorLRUCache, frames_fingerprint
+from .encode import (
+    DEFAULT_TILE_OVERLAP,
+    GreyClip,
+    encode_grey_clip,
+    grey_latent_block,
+)
+from .frames import resize_frames
+from .shm_cache import vae_identity
+
+
+# motion_amplitude input range; sweep values are held to the same bounds
+AMPLITUDE_RANGE = (1.0, 2.0)
+
+
+def parse_amplitudes(text: str) -> list:
+    """
+    Parse an amplitude sweep such as "1.0, 1.1, 1.2" (commas or spaces).
+
+    Values must be numbers within AMPLITUDE_RANGE (ValueError otherwise).
+
+    Returns:
+        List of floats (empty for an empty string)
+    """
+    low, high = AMPLITUDE_RANGE
+    values = []
+    for token in text.replace(",", " ").split():
+        try:
+            value = float(token)
+        except ValueError:
+            raise ValueError(f"Invalid amplitude in sweep: {token!r}") from None
+        if not low <= value <= high:
+            raise ValueError(f"Amplitude {token} in sweep is outside [{low}, {high}]")
+        values.append(value)
+    return values
+
+
+def _per_sample(value, like: torch.Tensor) -> torch.Tensor:
+    """Per-sample parameter (float or [N] tensor) as [N, 1, 1, 1, 1]."""
+    value = torch.as_tensor(value, device=like.device, dtype=torch.float32)
+    return value.reshape(-1, 1, 1, 1, 1).to(like.dtype)
+
 
 def apply_motion_amplitude(
     concat_latent: torch.Tensor,
     base_frame_idx: int,
-    amplitude: float,
+    amplitude,
     protect_brightness: bool = True,
 ) -> torch.Tensor:
     """
@@ -28,14 +71,20 @@ def apply_motion_amplitude(
     Args:
         concat_latent: Latent tensor [B, C, T, H, W]
         base_frame_idx: Index of the anchor frame (0 for start, -1 for end)
-        amplitude: Motion amplitude multiplier (1.0 = no change, 1.15 = recommended)
+        amplitude: Motion amplitude multiplier (1.0 = no change, 1.15 = recommended),
+            or a [N] tensor of amplitudes to enhance a batch-1 latent into N
+            samples at once
         protect_brightness: If True, preserve mean brightness during amplification
 
     Returns:
         Modified concat_latent tensor
     """
-    if amplitude <= 1.0:
+    active = torch.as_tensor(amplitude) > 1.0
+    if not active.any():
         return concat_latent
+    sweep = isinstance(amplitude, torch.Tensor)
+    if sweep:
+        amplitude = _per_sample(amplitude, concat_latent)
 
     # Extract base frame
     if base_frame_idx == 0:
@@ -50,7 +99,9 @@ def apply_motion_amplitude(
 
     if protect_brightness:
         # Preserve mean brightness by centering before scaling
-        diff_mean = diff.mean(dim=(1, 3, 4), keepdim=True)
+        # (statistics accumulate in fp32 for half-precision latents)
+        diff_mean = diff.mean(dim=(1, 3, 4), keepdim=True, dtype=torch.float32)
+        diff_mean = diff_mean.to(diff.dtype)
         diff_centered = diff - diff_mean
         scaled_latent = base_latent + diff_centered * amplitude + diff_mean
     else:
@@ -59,6 +110,13 @@ def apply_motion_amplitude(
     # Clamp to prevent artifacts
     scaled_latent = torch.clamp(scaled_latent, -6, 6)
 
+    if sweep:
+        # Amplitudes <= 1 leave their sample unchanged
+        scaled_latent = torch.where(
+            _per_sample(active, scaled_latent) > 0, scaled_latent, other_latent
+        )
+        base_latent = base_latent.expand(scaled_latent.shape[0], -1, -1, -1, -1)
+
     # Reconstruct
     if base_frame_idx == 0:
         return torch.cat([base_latent, scaled_latent], dim=2)
@@ -66,11 +124,75 @@ def apply_motion_amplitude(
         return torch.cat([scaled_latent, base_latent], dim=2)
 
 
+# Low-pass engines for apply_frequency_separation
+FREQUENCY_ENGINES = ("interpolate", "fft")
+
+# Default cutoff as a fraction of the latent resolution: 1/8 (area downscale
+# to h // 8 x w // 8, or the equivalent radius in the spectrum)
+DEFAULT_FREQUENCY_CUTOFF = 0.125
+
+# Steepness of the spectral mask (Butterworth order)
+FFT_MASK_ORDER = 2
+
+
+@functools.lru_cache(maxsize=16)
+def _radial_mask(h: int, w: int, cutoff: float, device) -> torch.Tensor:
+    """
+    Radial low-pass mask [h, w // 2 + 1] for torch.fft.rfft2 spectra.
+
+    Passes frequencies up to the Nyquist frequency of a `cutoff` downscale,
+    i.e. the band the area/bilinear path keeps, with a smooth Butterworth
+    roll-off instead of a hard edge to avoid ringing.
+    """
+    fy = torch.fft.fftfreq(h, device=device).view(-1, 1)
+    fx = torch.fft.rfftfreq(w, device=device).view(1, -1)
+    radius = torch.sqrt(fy**2 + fx**2) / (0.5 * cutoff)
+    return 1.0 / (1.0 + radius ** (2 * FFT_MASK_ORDER))
+
+
+def extract_low_frequency(
+    latent: torch.Tensor,
+    latent_channels: int = 16,
+    engine: str = "interpolate",
+    cutoff: float = DEFAULT_FREQUENCY_CUTOFF,
+) -> torch.Tensor:
+    """
+    Low-frequency (color) component of a latent, computed in fp32.
+
+    Args:
+        latent: Latent tensor [..., H, W]
+        latent_channels: Number of latent channels (interpolate engine)
+        engine: "interpolate" (area downscale + bilinear upscale) or "fft"
+            (rfft2 with a cached radial mask, no intermediate resolutions)
+        cutoff: Kept band as a fraction of the latent resolution
+
+    Returns:
+        Low-frequency tensor, same shape and dtype as `latent`
+    """
+    h, w = latent.shape[-2], latent.shape[-1]
+
+    if engine == "fft":
+        spectrum = torch.fft.rfft2(latent.float(), dim=(-2, -1))
+        spectrum *= _radial_mask(h, w, float(cutoff), spectrum.device)
+        low = torch.fft.irfft2(spectrum, s=(h, w), dim=(-2, -1))
+        return low.to(latent.dtype)
+
+    low = F.interpolate(
+        latent.reshape(-1, latent_channels, h, w).float(),
+        size=(max(1, int(h * cutoff)), max(1, int(w * cutoff))),
+        mode="area",
+    )
+    low = F.interpolate(low, size=(h, w), mode="bilinear")
+    return low.to(latent.dtype).view_as(latent)
+
+
 def apply_frequency_separation(
     official_latent: torch.Tensor,
     linear_baseline: torch.Tensor,
-    boost_scale: float,
+    boost_scale,
     latent_channels: int = 16,
+    engine: str = "interpolate",
+    cutoff: float = DEFAULT_FREQUENCY_CUTOFF,
 ) -> torch.Tensor:
     """
     Apply frequency separation enhancement for FLF2V mode.
@@ -81,28 +203,24 @@ def apply_frequency_separation(
     Args:
         official_latent: Encoded latent from official image sequence
         linear_baseline: Linear interpolation between start and end frames
-        boost_scale: High-frequency boost scale (0.0 = no boost, 4.0 = max)
+        boost_scale: High-frequency boost scale (0.0 = no boost, 4.0 = max),
+            or a [N] tensor of scales (output batch N)
         latent_channels: Number of latent channels (16 for Wan)
+        engine: Low-pass engine, see extract_low_frequency()
+        cutoff: Low-pass cutoff, see extract_low_frequency()
 
     Returns:
         Enhanced latent tensor
     """
-    if boost_scale <= 0.001:
+    boost_scale = _boost_scale(boost_scale, official_latent)
+    if boost_scale is None:
         return official_latent
 
     # Anti-Ghost Vector: diff between official (gray) and linear (PPT-style)
     diff = official_latent - linear_baseline
 
-    h, w = diff.shape[-2], diff.shape[-1]
-
-    # Extract low frequency (color) via downscale + upscale
-    low_freq_diff = F.interpolate(
-        diff.view(-1, latent_channels, h, w),
-        size=(max(1, h // 8), max(1, w // 8)),
-        mode="area",
-    )
-    low_freq_diff = F.interpolate(low_freq_diff, size=(h, w), mode="bilinear")
-    low_freq_diff = low_freq_diff.view_as(diff)
+    # Extract low frequency (color)
+    low_freq_diff = extract_low_frequency(diff, latent_channels, engine, cutoff)
 
     # Extract high frequency (structure/ghosting)
     high_freq_diff = diff - low_freq_diff
@@ -111,58 +229,172 @@ def apply_frequency_separation(
     return official_latent + (high_freq_diff * boost_scale)
 
 
+def _boost_scale(boost_scale, like: torch.Tensor):
+    """Boost as float or [N, 1, 1, 1, 1] (<= 0.001 = off), None if all off."""
+    if not isinstance(boost_scale, torch.Tensor):
+        return boost_scale if boost_scale > 0.001 else None
+    boost_scale = _per_sample(boost_scale, like)
+    if not (boost_scale > 0.001).any():
+        return None
+    return boost_scale * (boost_scale > 0.001)
+
+
+def linear_high_frequency(
+    latent: torch.Tensor,
+    start_latent: torch.Tensor,
+    end_latent: torch.Tensor,
+    latent_channels: int = 16,
+    engine: str = "interpolate",
+    cutoff: float = DEFAULT_FREQUENCY_CUTOFF,
+) -> torch.Tensor:
+    """
+    High frequencies of latent - lerp(start_latent, end_latent, t), t = 0..1
+    over the frames, without materializing the interpolation.
+
+    The low-pass is linear and works frame by frame, so
+
+        high(latent - lerp) = high(latent) - high(start)
+                              - t * (high(end) - high(start))
+
+    which only filters two extra single frames. The per-frame term is applied
+    in place with addcmul_, so the result is the only full-size buffer.
+    """
+    ends = torch.cat([start_latent, end_latent], dim=2)
+    ends_high = ends - extract_low_frequency(ends, latent_channels, engine, cutoff)
+    start_high = ends_high[:, :, :1]
+    delta_high = ends_high[:, :, 1:] - start_high
+
+    t = torch.linspace(
+        0.0, 1.0, latent.shape[2], device=latent.device, dtype=latent.dtype
+    ).view(1, 1, -1, 1, 1)
+
+    high = extract_low_frequency(latent, latent_channels, engine, cutoff)
+    high.neg_().add_(latent)
+    high.sub_(start_high)
+    return high.addcmul_(t, delta_high, value=-1)
+
+
+def apply_frequency_separation_linear(
+    official_latent: torch.Tensor,
+    start_latent: torch.Tensor,
+    end_latent: torch.Tensor,
+    boost_scale,
+    latent_channels: int = 16,
+    engine: str = "interpolate",
+    cutoff: float = DEFAULT_FREQUENCY_CUTOFF,
+) -> torch.Tensor:
+    """
+    apply_frequency_separation() against the linear baseline between
+    start_latent and end_latent (FLF2V), computed via linear_high_frequency().
+
+    Returns:
+        official + boost_scale * high(official - linear_baseline)
+    """
+    boost_scale = _boost_scale(boost_scale, official_latent)
+    if boost_scale is None:
+        return official_latent
+
+    high = linear_high_frequency(
+        official_latent, start_latent, end_latent, latent_channels, engine, cutoff
+    )
+    if isinstance(boost_scale, torch.Tensor):
+        return official_latent + high * boost_scale
+    return high.mul_(boost_scale).add_(official_latent)
+
+
+# reference_motion latents by source-frame fingerprint, so per-segment loops
+# re-using the same previous video do not re-encode it
+REFERENCE_MOTION_CACHE_BYTES = 512 * 1024**2
+_reference_motion_cache = TensorLRUCache(REFERENCE_MOTION_CACHE_BYTES)
+
+
+class _ReferenceClip(GreyClip):
+    """Grey clip whose last frames are video frames, resized when rendered."""
+
+    def __init__(self, frames: torch.Tensor, length: int, height: int, width: int):
+        super().__init__(length, height, width)
+        self.source = frames
+        self.pad = length - frames.shape[0]
+
+    def render(self, start: int = 0, end: int = None) -> torch.Tensor:
+        image = super().render(start, end)
+        end = start + image.shape[0]
+        first = max(start, self.pad)
+        if first < end:
+            image[first - start :] = resize_frames(
+                self.source[first - self.pad : end - self.pad, :, :, :3],
+                self.width,
+                self.height,
+            ).to(image)
+        return image
+
+
 def extract_reference_motion(
     vae,
     video_frames: torch.Tensor,
     width: int,
     height: int,
     target_length: int,
+    chunk_frames: int = 0,
+    tile_size: int = 0,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
 ) -> torch.Tensor:
     """
     Extract reference_motion latent from video frames.
 
+    The last `target_length` frames (grey-padded in front when the video is
+    shorter) are resized and encoded in VAE-aligned temporal chunks, so only
+    one chunk of pixels exists at a time. Latents that only cover padding come
+    from a cached grey-latent block instead of being encoded. Results are
+    cached by a fingerprint of the source frames.
+
     Args:
         vae: VAE model for encoding
         video_frames: Video tensor [T, H, W, C]
         width: Target width
         height: Target height
         target_length: Target number of image frames (will be converted to latent frames)
+        chunk_frames: Pixel frames per encode chunk (0 = automatic)
+        tile_size: See encode_pixels()
+        tile_overlap: See encode_pixels()
 
     Returns:
-        reference_motion latent tensor
+        reference_motion latent tensor (shared with the cache, read-only)
     """
-    device = mm.intermediate_device()
-
     # Calculate latent frames
     latent_frames = ((target_length - 1) // 4) + 1
 
     # Take last N frames from reference video
     frames_to_extract = min(target_length, video_frames.shape[0])
-    ref_motion = video_frames[-frames_to_extract:].clone()
-
-    # Resize to target dimensions
-    ref_motion = comfy.utils.common_upscale(
-        ref_motion.movedim(-1, 1), width, height, "bilinear", "center"
-    ).movedim(1, -1)
-
-    # Pad with gray if insufficient frames
-    if ref_motion.shape[0] < target_length:
-        gray_fill = (
-            torch.ones(
-                [target_length, height, width, 3],
-                device=device,
-                dtype=ref_motion.dtype,
-            )
-            * 0.5
-        )
-        gray_fill[-ref_motion.shape[0] :] = ref_motion
-        ref_motion = gray_fill
+    source = video_frames[-frames_to_extract:]
+
+    key = (vae_identity(vae), frames_fingerprint(source), width, height, target_length)
+    cached = _reference_motion_cache.get(key)
+    if cached is not None:
+        return cached
+
+    clip = _ReferenceClip(source, target_length, height, width)
 
-    # Encode and take last latent_frames
-    ref_motion_latent = vae.encode(ref_motion[:, :, :, :3])
+    # Leading latents whose 4-frame group is all padding
+    pad = clip.pad
+    grey_latents = (pad - 1) // 4 + 1 if pad > 0 else 0
+
+    if grey_latents == 0:
+        latent = encode_grey_clip(vae, clip, chunk_frames, tile_size, tile_overlap)
+    else:
+        motion = encode_grey_clip(
+            vae,
+            clip,
+            chunk_frames,
+            tile_size,
+            tile_overlap,
+            start_latent=grey_latents,
+        )
+        grey = grey_latent_block(vae, grey_latents, height, width)
+        latent = torch.cat([grey.to(motion), motion], dim=2)
 
     # Return the last latent_frames (matching target video length)
-    return ref_motion_latent[:, :, -latent_frames:]
+    return _reference_motion_cache.put(key, latent[:, :, -latent_frames:])
 
 
 def merge_clip_vision_outputs(*outputs):
@@ -197,6 +429,55 @@ def merge_clip_vision_outputs(*outputs):
     return merged
 
 
+# CLIP vision outputs of single anchor images, by model and image fingerprint
+CLIP_VISION_CACHE_BYTES = 64 * 1024**2
+_clip_vision_cache = TensorLRUCache(CLIP_VISION_CACHE_BYTES)
+
+
+def encode_clip_vision(
+    clip_vision_model, images, crop: bool = True, content_hash: str = "sampled"
+) -> list:
+    """
+    Encode anchor images with one batched CLIP vision forward pass.
+
+    Images already encoded by the same model (same content fingerprint) come
+    from a cache; the rest are stacked and encoded together, then split into
+    one output per image.
+
+    Args:
+        clip_vision_model: CLIP vision model (CLIP_VISION)
+        images: IMAGE tensors [1, H, W, C] of equal size; None entries are skipped
+        crop: Center crop before encoding (as CLIP Vision Encode)
+        content_hash: "sampled", "full" or "off" (no caching)
+
+    Returns:
+        List of CLIP vision outputs, one per non-None image
+    """
+    images = [image[:1, :, :, :3] for image in images if image is not None]
+    outputs = [None] * len(images)
+    keys = [None] * len(images)
+    if content_hash != "off":
+        for i, image in enumerate(images):
+            fingerprint = frames_fingerprint(image, content_hash)
+            keys[i] = (id(clip_vision_model), fingerprint, crop)
+            outputs[i] = _clip_vision_cache.get(keys[i])
+
+    missing = [i for i, output in enumerate(outputs) if output is None]
+    if missing:
+        batch = torch.cat([images[i] for i in missing])
+        encoded = clip_vision_model.encode_image(batch, crop=crop)
+        for j, i in enumerate(missing):
+            single = comfy.clip_vision.Output()
+            for name, value in vars(encoded).items():
+                if isinstance(value, torch.Tensor) and value.shape[0] == len(missing):
+                    value = value[j : j + 1]
+                setattr(single, name, value)
+            outputs[i] = single
+            if keys[i] is not None:
+                _clip_vision_cache.put(keys[i], single)
+    return outputs
+
+
 def apply_clip_vision(clip_vision_output, positive, negative):
     """
     Apply CLIP vision output to positive and negative conditioning.
@@ -222,6 +503,29 @@ def apply_clip_vision(clip_vision_output, positive, negative):
     return positive, negative
 
 
+@functools.lru_cache(maxsize=None)
+def _svi_latents_mean_cpu(latent_channels: int) -> torch.Tensor:
+    zeros = torch.zeros(1, latent_channels, 1, 1, 1)
+    return comfy.latent_formats.Wan21().process_out(zeros).reshape(-1)
+
+
+def svi_latents_mean(latent_channels: int, device=None, dtype=None) -> torch.Tensor:
+    """
+    Per-channel SVI padding value, Wan21().process_out(0) = latents_mean.
+
+    process_out is affine per channel, so the padding latent is this [C]
+    vector broadcast over T, H and W. Computed once per channel count.
+
+    Returns:
+        [C] tensor on `device` (default intermediate device) in `dtype`
+        (default float32)
+    """
+    if device is None:
+        device = mm.intermediate_device()
+    mean = _svi_latents_mean_cpu(latent_channels)
+    return mean.to(device=device, dtype=dtype or torch.float32)
+
+
 def get_svi_padding_latent(
     batch_size: int,
     latent_channels: int,
@@ -230,6 +534,7 @@ def get_svi_padding_latent(
     width: int,
     spacial_scale: int,
     device=None,
+    dtype=None,
 ) -> torch.Tensor:
     """
     Get SVI-compatible padding latent (latents_mean).
@@ -245,25 +550,55 @@ def get_svi_padding_latent(
         width: Image width
         spacial_scale: VAE spatial compression factor (typically 8)
         device: Target device
+        dtype: Target dtype (default float32)
 
     Returns:
         SVI-compatible padding latent tensor
     """
-    if device is None:
-        device = mm.intermediate_device()
-
-    # Create zeros and apply Wan21 process_out to get latents_mean
-    zeros = torch.zeros(
-        batch_size,
+    return SVILatent(
         latent_channels,
         latent_frames,
         height // spacial_scale,
         width // spacial_scale,
-        device=device,
-    )
+        batch_size=batch_size,
+    ).materialize(device, dtype)
+
 
-    # process_out converts to latents_mean
-    return comfy.latent_formats.Wan21().process_out(zeros)
+class SVILatent:
+    """
+    Lazy SVI concat latent: "latents_mean everywhere, except frame k = X".
+
+    Only the anchor, motion and end frames ever differ from the padding, so
+    the latent is kept as those overrides and materialized with one broadcast
+    fill when it is handed to the conditioning.
+
+    Args:
+        latent_channels, latent_frames, H, W: Latent geometry
+        batch_size: Batch size of the materialized latent
+    """
+
+    def __init__(self, latent_channels, latent_frames, H, W, batch_size=1):
+        self.shape = (batch_size, latent_channels, latent_frames, H, W)
+        self.frames = {}
+
+    def set_frame(self, index: int, latent: torch.Tensor):
+        """Override latent frame `index` with a latent [B, C, 1, H, W]."""
+        self.frames[index % self.shape[2]] = latent
+
+    def copy(self) -> "SVILatent":
+        other = SVILatent.__new__(SVILatent)
+        other.shape = self.shape
+        other.frames = dict(self.frames)
+        return other
+
+    def materialize(self, device=None, dtype=None) -> torch.Tensor:
+        """Render the full [B, C, T, H, W] latent."""
+        mean = svi_latents_mean(self.shape[1], device, dtype)
+        latent = torch.empty(self.shape, device=mean.device, dtype=mean.dtype)
+        latent.copy_(mean.view(1, -1, 1, 1, 1).expand(self.shape))
+        for index, frame in self.frames.items():
+            latent[:, :, index : index + 1] = frame
+        return latent
 
 
 def apply_color_protect(
@@ -292,38 +627,33 @@ def apply_color_protect(
     if correct_strength <= 0:
         return enhanced_latent
 
-    # Clone to avoid modifying input
-    result = enhanced_latent.clone()
-
-    orig_mean = original_latent.mean(dim=(2, 3, 4))
-    enhanced_mean = result.mean(dim=(2, 3, 4))
+    # Channel statistics accumulate in fp32 for half-precision latents.
+    # original_latent may have batch 1 while enhanced_latent holds N samples
+    # (amplitude sweep); every sample is corrected against its own statistics.
+    orig_mean = original_latent.mean(dim=(2, 3, 4), dtype=torch.float32)
+    enhanced_mean = enhanced_latent.mean(dim=(2, 3, 4), dtype=torch.float32)
 
-    mean_drift = torch.abs(enhanced_mean - orig_mean) / (torch.abs(orig_mean) + 1e-6)
+    drift_amount = enhanced_mean - orig_mean
+    mean_drift = torch.abs(drift_amount) / (torch.abs(orig_mean) + 1e-6)
     problem_channels = mean_drift > drift_threshold
 
-    if problem_channels.any():
-        drift_amount = enhanced_mean - orig_mean
-        correction = drift_amount * problem_channels.float() * correct_strength * 0.03
-
-        for b in range(result.shape[0]):
-            for c in range(result.shape[1]):
-                if correction[b, c].abs() > 0:
-                    result[b, c] = torch.where(
-                        result[b, c] > 0,
-                        result[b, c] - correction[b, c],
-                        result[b, c],
-                    )
-
-    # Brightness protection
-    orig_brightness = original_latent.mean()
-    enhanced_brightness = result.mean()
-
-    if enhanced_brightness < orig_brightness * brightness_threshold:
-        brightness_boost = min(orig_brightness / (enhanced_brightness + 1e-6), 1.05)
-        result = torch.where(
-            result < 0.5,
-            result * brightness_boost,
-            result,
-        )
+    # Pull positive values of drifting channels back (zero elsewhere)
+    correction = drift_amount * problem_channels.float() * correct_strength * 0.03
+    correction = correction.to(enhanced_latent.dtype)[:, :, None, None, None]
+    result = torch.where(
+        enhanced_latent > 0, enhanced_latent - correction, enhanced_latent
+    )
+
+    # Brightness protection (per sample)
+    orig_brightness = original_latent.mean(dim=(1, 2, 3, 4), dtype=torch.float32)
+    enhanced_brightness = result.mean(dim=(1, 2, 3, 4), dtype=torch.float32)
+
+    brightness_boost = torch.where(
+        enhanced_brightness < orig_brightness * brightness_threshold,
+        torch.clamp(orig_brightness / (enhanced_brightness + 1e-6), max=1.05),
+        torch.ones_like(enhanced_brightness),
+    )
+    brightness_boost = _per_sample(brightness_boost, result)
+    result = torch.where(result < 0.5, result * brightness_boost, result)
 
     return torch.clamp(result, -6, 6)
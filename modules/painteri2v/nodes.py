@@ -1,17 +1,28 @@
 import torch
 import comfy.model_management as mm
-import comfy.utils
-import comfy.latent_formats
 import node_helpers
 from comfy_api.latest import io
 
 from ..common.utils import (
-    apply_motion_amplitude,
-    apply_color_protect,
-    apply_frequency_separation,
+    DEFAULT_FREQUENCY_CUTOFF,
+    FREQUENCY_ENGINES,
+    SVILatent,
     apply_clip_vision,
-    get_svi_padding_latent,
+    encode_clip_vision,
+    merge_clip_vision_outputs,
+    parse_amplitudes,
 )
+from ..common.frames import gather_frames
+from ..common.concurrency import DEFAULT_PREP_THREADS, MAX_PREP_THREADS
+from ..common.encode import (
+    GreyClip,
+    encode_grey_clip_cached,
+    encode_pixels_cached,
+    prefetch_grey_clip,
+)
+from ..common.cache import CONTENT_HASH_MODES
+from ..common.planner import PRECISIONS, plan_execution, log_plan
+from ..common.postprocess import ENGINES, enhance_latent
 
 
 class PainterI2V(io.ComfyNode):
@@ -65,6 +76,89 @@ class PainterI2V(io.ComfyNode):
                 io.Image.Input("start_image", optional=True),
                 io.Image.Input("end_image", optional=True),
                 io.ClipVisionOutput.Input("clip_vision", optional=True),
+                io.ClipVision.Input(
+                    "clip_vision_model",
+                    optional=True,
+                    tooltip="Encodes start/end images in one batch (cached) when clip_vision is not connected.",
+                ),
+                io.Int.Input(
+                    "vae_tile_size",
+                    default=0,
+                    min=0,
+                    max=4096,
+                    step=32,
+                    optional=True,
+                    tooltip="VAE encode tile size for video clips (single frames only when they do not fit). 0 = untiled, with ComfyUI's tiled fallback on OOM.",
+                ),
+                io.Int.Input(
+                    "vae_tile_overlap",
+                    default=64,
+                    min=0,
+                    max=512,
+                    step=16,
+                    optional=True,
+                    tooltip="Overlap between VAE encode tiles.",
+                ),
+                io.Int.Input(
+                    "encode_chunk_frames",
+                    default=0,
+                    min=0,
+                    max=4096,
+                    step=4,
+                    optional=True,
+                    tooltip="Stream the VAE encode in chunks of N frames. 0 = auto.",
+                ),
+                io.Combo.Input(
+                    "precision",
+                    options=list(PRECISIONS),
+                    default="fp32",
+                    optional=True,
+                    tooltip="Conditioning dtype. fp16/bf16 halve the cached conditioning.",
+                ),
+                io.Combo.Input(
+                    "enhance_engine",
+                    options=list(ENGINES),
+                    default="eager",
+                    optional=True,
+                    tooltip="Motion/color enhancement: eager, fused (in place) or compile (torch.compile).",
+                ),
+                io.Combo.Input(
+                    "freq_engine",
+                    options=list(FREQUENCY_ENGINES),
+                    default="interpolate",
+                    optional=True,
+                    tooltip="FLF2V low-pass: interpolate (area + bilinear) or fft.",
+                ),
+                io.Float.Input(
+                    "freq_cutoff",
+                    default=DEFAULT_FREQUENCY_CUTOFF,
+                    min=0.01,
+                    max=1.0,
+                    step=0.005,
+                    optional=True,
+                    tooltip="FLF2V low-pass cutoff as a fraction of the latent size.",
+                ),
+                io.String.Input(
+                    "amplitude_sweep",
+                    default="",
+                    optional=True,
+                    tooltip="Comma-separated motion_amplitude values, e.g. 1.0, 1.1, 1.2. Encodes once and outputs batch_size samples per value (overrides motion_amplitude).",
+                ),
+                io.Int.Input(
+                    "prep_threads",
+                    default=DEFAULT_PREP_THREADS,
+                    min=0,
+                    max=MAX_PREP_THREADS,
+                    optional=True,
+                    tooltip="CPU threads preparing frames while the VAE encodes. 0 = serial.",
+                ),
+                io.Combo.Input(
+                    "content_hash",
+                    options=list(CONTENT_HASH_MODES),
+                    default="sampled",
+                    optional=True,
+                    tooltip="Skip work for inputs with unchanged content: sampled hash (single images hashed in full), full hash or off. This node only takes single images, so sampled and full behave the same.",
+                ),
             ],
             outputs=[
                 io.Conditioning.Output(display_name="positive"),
@@ -87,8 +181,19 @@ class PainterI2V(io.ComfyNode):
         start_image=None,
         end_image=None,
         clip_vision=None,
+        clip_vision_model=None,
         color_protect=True,
         svi_mode=False,
+        vae_tile_size=0,
+        vae_tile_overlap=64,
+        encode_chunk_frames=0,
+        precision="fp32",
+        enhance_engine="eager",
+        freq_engine="interpolate",
+        freq_cutoff=DEFAULT_FREQUENCY_CUTOFF,
+        prep_threads=DEFAULT_PREP_THREADS,
+        amplitude_sweep="",
+        content_hash="sampled",
     ) -> io.NodeOutput:
         device = mm.intermediate_device()
         spacial_scale = vae.spacial_compression_encode()
@@ -97,106 +202,167 @@ class PainterI2V(io.ComfyNode):
         H = height // spacial_scale
         W = width // spacial_scale
 
+        # Amplitude sweep: one encode, one conditioning sample per amplitude.
+        # The sampler stretches the concat batch over the latent batch, so
+        # amplitude k drives samples [k * batch_size, (k + 1) * batch_size)
+        amplitudes = parse_amplitudes(amplitude_sweep or "")
+        sweep = len(amplitudes) > 0
+        if sweep:
+            motion_amplitude = max(amplitudes)
+        sweep_count = len(amplitudes) if sweep else 1
+
+        # Pick full / tiled / fp16 / chunked execution to fit free memory
+        plan = plan_execution(
+            "PainterI2V",
+            width=width,
+            height=height,
+            length=length,
+            batch_size=batch_size * sweep_count,
+            svi_mode=svi_mode,
+            vae=vae,
+            tile_size=vae_tile_size,
+            tile_overlap=vae_tile_overlap,
+            chunk_frames=encode_chunk_frames,
+            precision=precision,
+        )
+        log_plan(plan)
+        dtype = plan.latent_dtype
+
         # === 1. 初始化输出 latent ===
         latent = torch.zeros(
-            [batch_size, latent_channels, latent_t, H, W], device=device
+            [batch_size * sweep_count, latent_channels, latent_t, H, W], device=device
         )
 
         # === 2. 判断模式 + 预处理图像 ===
         has_start = start_image is not None
         has_end = end_image is not None
-        anchor_start = False
-        anchor_end = False
         start_latent_cached = None
         end_latent_cached = None
 
+        frames = gather_frames(
+            {
+                "start": (start_image, 0) if has_start else None,
+                "end": (end_image, -1) if has_end else None,
+            },
+            width,
+            height,
+        )
+        start_image = frames["start"]
+        end_image = frames["end"]
+
+        anchor_start = has_start
+        anchor_end = has_end
+
+        # 标准模式的灰色序列先交给后台线程渲染，与锚点编码重叠（缓存命中时不渲染）
+        clip = None
+        if (has_start or has_end) and not svi_mode:
+            clip = GreyClip(
+                length, height, width, device=device, dtype=plan.pixel_dtype
+            )
+            if anchor_start:
+                clip.set_frame(0, start_image)
+            if anchor_end:
+                clip.set_frame(-1, end_image)
+            prefetch_grey_clip(
+                vae,
+                clip,
+                plan.chunk_frames,
+                plan.tile_size,
+                plan.tile_overlap,
+                content_hash,
+                prep_threads,
+            )
+
         if has_start:
-            start_image = comfy.utils.common_upscale(
-                start_image[:1].movedim(-1, 1), width, height, "bilinear", "center"
-            ).movedim(1, -1)
-            anchor_start = True
-            start_latent_cached = vae.encode(start_image[:, :, :, :3])
+            start_latent_cached = encode_pixels_cached(
+                vae,
+                start_image,
+                plan.anchor_tile_size,
+                plan.tile_overlap,
+                content_hash,
+            ).to(dtype)
 
         if has_end:
-            end_image = comfy.utils.common_upscale(
-                end_image[-1:].movedim(-1, 1), width, height, "bilinear", "center"
-            ).movedim(1, -1)
-            anchor_end = True
-            end_latent_cached = vae.encode(end_image[:, :, :, :3])
+            end_latent_cached = encode_pixels_cached(
+                vae,
+                end_image,
+                plan.anchor_tile_size,
+                plan.tile_overlap,
+                content_hash,
+            ).to(dtype)
 
         # === 3. 构建 image 序列 + 编码 ===
         if has_start or has_end:
             if svi_mode:
                 # SVI 模式：用 latents_mean 填充
-                concat_latent = get_svi_padding_latent(
-                    batch_size=1,
-                    latent_channels=latent_channels,
-                    latent_frames=latent_t,
-                    height=height,
-                    width=width,
-                    spacial_scale=spacial_scale,
-                    device=device,
-                )
+                concat = SVILatent(latent_channels, latent_t, H, W)
                 # 插入锚点 (使用缓存)
                 if anchor_start and start_latent_cached is not None:
-                    concat_latent[:, :, :1] = start_latent_cached
+                    concat.set_frame(0, start_latent_cached)
                 if anchor_end and end_latent_cached is not None:
-                    concat_latent[:, :, -1:] = end_latent_cached
+                    concat.set_frame(-1, end_latent_cached)
+                concat_latent = concat.materialize(device, dtype)
             else:
                 # 标准模式：灰色填充 + 编码
-                image = torch.ones((length, height, width, 3), device=device) * 0.5
-                if anchor_start:
-                    image[0] = start_image[0, :, :, :3]
-                if anchor_end:
-                    image[-1] = end_image[0, :, :, :3]
-                concat_latent = vae.encode(image)
-
-            # === 4. 保存原始 concat_latent ===
-            concat_latent_original = concat_latent.clone()
-
-            # === 5. 构建 mask ===
-            mask = torch.ones((1, 1, latent_t, H, W), device=device)
+                concat_latent = encode_grey_clip_cached(
+                    vae,
+                    clip,
+                    plan.chunk_frames,
+                    plan.tile_size,
+                    plan.tile_overlap,
+                    content_hash,
+                    prep_threads,
+                ).to(dtype)
+
+            # === 4. 构建 mask (与 concat_latent 同 dtype/device) ===
+            mask = torch.ones(
+                (1, 1, latent_t, H, W),
+                device=concat_latent.device,
+                dtype=concat_latent.dtype,
+            )
             if anchor_start:
                 mask[:, :, :1] = 0.0
             if anchor_end:
                 mask[:, :, -1:] = 0.0
 
-            # === 6. 应用 motion_amplitude ===
+            # === 5. 选择增强方式 ===
+            enhance = {}
             if has_start and has_end:
                 # ==================== FLF2V MODE ====================
-                # 计算线性插值基线
-                start_l = concat_latent[:, :, 0:1]
-                end_l = concat_latent[:, :, -1:]
-                t = torch.linspace(0.0, 1.0, latent_t, device=device)
-                t = t.view(1, 1, -1, 1, 1)
-                linear_latent = start_l * (1 - t) + end_l * t
-
                 # 频率分离 (Inverse Structural Repulsion)
                 if length > 2 and motion_amplitude > 1.001:
-                    boost_scale = (motion_amplitude - 1.0) * 4.0
-                    concat_latent = apply_frequency_separation(
-                        concat_latent,
-                        linear_latent,
-                        boost_scale,
-                        latent_channels=latent_channels,
-                    )
-            else:
+                    # 线性插值基线 (首尾帧，不生成完整张量)
+                    start_l = concat_latent[:, :, 0:1]
+                    end_l = concat_latent[:, :, -1:]
+                    enhance = {
+                        "baseline": (start_l, end_l),
+                        "boost_scale": (
+                            [(a - 1.0) * 4.0 for a in amplitudes]
+                            if sweep
+                            else (motion_amplitude - 1.0) * 4.0
+                        ),
+                        "latent_channels": latent_channels,
+                        "freq_engine": freq_engine,
+                        "freq_cutoff": freq_cutoff,
+                    }
+            elif motion_amplitude > 1.0:
                 # ==================== I2V MODE ====================
                 # 简单差值放大
-                if motion_amplitude > 1.0:
-                    base_frame_idx = 0 if anchor_start else -1
-                    concat_latent = apply_motion_amplitude(
-                        concat_latent,
-                        base_frame_idx=base_frame_idx,
-                        amplitude=motion_amplitude,
-                        protect_brightness=True,
-                    )
-
-            # === 7. 应用 color_protect ===
-            if motion_amplitude > 1.0 and color_protect:
-                concat_latent = apply_color_protect(
-                    concat_latent, concat_latent_original
-                )
+                enhance = {
+                    "amplitude": amplitudes if sweep else motion_amplitude,
+                    "base_frame_idx": 0 if anchor_start else -1,
+                }
+
+            # === 6-7. 应用 motion_amplitude + color_protect (一次调用) ===
+            # 扫描模式下输出 [N, C, T, H, W]，每个幅度一个样本
+            if sweep and not enhance:
+                enhance = {"amplitude": [1.0] * sweep_count}
+            concat_latent = enhance_latent(
+                concat_latent,
+                color_protect=color_protect and motion_amplitude > 1.0,
+                engine=enhance_engine,
+                **enhance,
+            )
 
             # === 8. 设置 conditioning ===
             positive = node_helpers.conditioning_set_values(
@@ -224,6 +390,15 @@ class PainterI2V(io.ComfyNode):
                 )
 
         # === 10. 添加 clip_vision ===
+        # 未连接 clip_vision 时，用 clip_vision_model 批量编码首尾帧 (带缓存)
+        if clip_vision is None and clip_vision_model is not None:
+            clip_vision = merge_clip_vision_outputs(
+                *encode_clip_vision(
+                    clip_vision_model,
+                    [start_image, end_image],
+                    content_hash=content_hash,
+                )
+            )
         positive, negative = apply_clip_vision(clip_vision, positive, negative)
 
         out_latent = {"samples": latent}
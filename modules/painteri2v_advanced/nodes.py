@@ -16,15 +16,29 @@ Covers all scenarios from PainterI2V and PainterI2VExtend.
 
 import torch
 import comfy.model_management as mm
-import comfy.utils
 import node_helpers
 from comfy_api.latest import io
 
 from ..common.utils import (
-    apply_motion_amplitude,
-    apply_color_protect,
-    apply_clip_vision,
-    get_svi_padding_latent,
+    SVILatent,
+    encode_clip_vision,
+    merge_clip_vision_outputs,
+)
+from ..common.frames import gather_frames, resize_frames
+from ..common.encode import (
+    GreyClip,
+    encode_grey_clip_cached,
+    encode_pixels_cached,
+)
+from ..common.planner import PRECISIONS, plan_execution, log_plan
+from ..common.postprocess import ENGINES, enhance_latent
+from ..common.frame_store import FrameStoreType
+from ..common.cache import CONTENT_HASH_MODES
+from ..common.segment_state import (
+    SegmentState,
+    SegmentStateType,
+    content_key,
+    usable_state,
 )
 
 
@@ -99,6 +113,11 @@ class PainterI2VAdvanced(io.ComfyNode):
                     optional=True,
                     tooltip="Low noise only.",
                 ),
+                io.ClipVision.Input(
+                    "clip_vision_model",
+                    optional=True,
+                    tooltip="Encodes start/end images in one batch (cached) when clip_vision is not connected.",
+                ),
                 io.Latent.Input(
                     "previous_latent",
                     optional=True,
@@ -109,6 +128,64 @@ class PainterI2VAdvanced(io.ComfyNode):
                     optional=True,
                     tooltip="Auto-converts based on svi_mode. Exclusive with previous_latent.",
                 ),
+                FrameStoreType.Input(
+                    "previous_frames",
+                    optional=True,
+                    tooltip="On-disk frame store. Used as previous_image, read on demand.",
+                ),
+                io.Int.Input(
+                    "vae_tile_size",
+                    default=0,
+                    min=0,
+                    max=4096,
+                    step=32,
+                    optional=True,
+                    tooltip="VAE encode tile size for video clips (single frames only when they do not fit). 0 = untiled, with ComfyUI's tiled fallback on OOM.",
+                ),
+                io.Int.Input(
+                    "vae_tile_overlap",
+                    default=64,
+                    min=0,
+                    max=512,
+                    step=16,
+                    optional=True,
+                    tooltip="Overlap between VAE encode tiles.",
+                ),
+                io.Int.Input(
+                    "encode_chunk_frames",
+                    default=0,
+                    min=0,
+                    max=4096,
+                    step=4,
+                    optional=True,
+                    tooltip="Stream the VAE encode in chunks of N frames. 0 = auto.",
+                ),
+                io.Combo.Input(
+                    "precision",
+                    options=list(PRECISIONS),
+                    default="fp32",
+                    optional=True,
+                    tooltip="Conditioning dtype. fp16/bf16 halve the cached conditioning.",
+                ),
+                io.Combo.Input(
+                    "enhance_engine",
+                    options=list(ENGINES),
+                    default="eager",
+                    optional=True,
+                    tooltip="Motion/color enhancement: eager, fused (in place) or compile (torch.compile).",
+                ),
+                io.Combo.Input(
+                    "content_hash",
+                    options=list(CONTENT_HASH_MODES),
+                    default="sampled",
+                    optional=True,
+                    tooltip="Skip work for inputs with unchanged content: sampled hash (single images hashed in full), full hash or off.",
+                ),
+                SegmentStateType.Input(
+                    "segment_state",
+                    optional=True,
+                    tooltip="State from the previous loop iteration. Reuses its anchor latent and clip_vision; the tail latent only when the same previous input is fed again.",
+                ),
             ],
             outputs=[
                 io.Conditioning.Output(display_name="high_positive"),
@@ -116,6 +193,7 @@ class PainterI2VAdvanced(io.ComfyNode):
                 io.Conditioning.Output(display_name="low_positive"),
                 io.Conditioning.Output(display_name="low_negative"),
                 io.Latent.Output(display_name="latent"),
+                SegmentStateType.Output(display_name="segment_state"),
             ],
         )
 
@@ -137,8 +215,17 @@ class PainterI2VAdvanced(io.ComfyNode):
         start_image=None,
         end_image=None,
         clip_vision=None,
+        clip_vision_model=None,
         previous_latent=None,
         previous_image=None,
+        previous_frames=None,
+        vae_tile_size=0,
+        vae_tile_overlap=64,
+        encode_chunk_frames=0,
+        precision="fp32",
+        enhance_engine="eager",
+        content_hash="sampled",
+        segment_state=None,
     ) -> io.NodeOutput:
         device = mm.intermediate_device()
         spacial_scale = vae.spacial_compression_encode()
@@ -147,8 +234,40 @@ class PainterI2VAdvanced(io.ComfyNode):
         H = height // spacial_scale
         W = width // spacial_scale
 
+        # Pick full / tiled / fp16 / chunked execution to fit free memory
+        plan = plan_execution(
+            "PainterI2VAdvanced",
+            width=width,
+            height=height,
+            length=length,
+            batch_size=1,
+            svi_mode=svi_mode,
+            vae=vae,
+            tile_size=vae_tile_size,
+            tile_overlap=vae_tile_overlap,
+            chunk_frames=encode_chunk_frames,
+            precision=precision,
+        )
+        log_plan(plan)
+        dtype = plan.latent_dtype
+
         latent = torch.zeros([1, latent_channels, latent_t, H, W], device=device)
 
+        # Results of the previous loop iteration, if computed for this geometry
+        state = usable_state(
+            segment_state, width, height, latent_channels, dtype, svi_mode
+        )
+        cached_reference = None
+        if start_image is None:
+            # Loop iterations after the first may drop start_image entirely
+            reference_key = state.reference_key if state else ""
+            if state is not None:
+                cached_reference = state.reference_latent
+        else:
+            reference_key = content_key(start_image, content_hash)
+            if state is not None:
+                cached_reference = state.reference_for(reference_key)
+
         has_start = start_image is not None
         has_end = end_image is not None
 
@@ -159,6 +278,10 @@ class PainterI2VAdvanced(io.ComfyNode):
             if prev_samples.ndim == 5 and prev_samples.shape[2] > 0:
                 has_previous_latent = True
 
+        # Frame store handles index like IMAGE tensors
+        if previous_image is None:
+            previous_image = previous_frames
+
         has_previous_image = previous_image is not None and previous_image.shape[0] > 0
 
         # Validate: cannot have both previous_latent and previous_image
@@ -169,15 +292,26 @@ class PainterI2VAdvanced(io.ComfyNode):
             )
 
         # Auto-convert based on svi_mode
+        tail_key = ""
+        tail_latent = None
         if svi_mode:
             # SVI mode needs previous_latent
             if has_previous_image and not has_previous_latent:
-                # Convert previous_image to latent
-                prev_img_resized = comfy.utils.common_upscale(
-                    previous_image.movedim(-1, 1), width, height, "bilinear", "center"
-                ).movedim(1, -1)
-                prev_latent_encoded = vae.encode(prev_img_resized[:, :, :, :3])
-                previous_latent = {"samples": prev_latent_encoded}
+                # Convert previous_image to latent (the state keeps its tail)
+                tail_key = content_key(previous_image, content_hash)
+                tail_latent = state.tail_for(tail_key) if state else None
+                if tail_latent is None:
+                    prev_img_resized = resize_frames(
+                        previous_image[:, :, :, :3], width, height
+                    )
+                    tail_latent = encode_pixels_cached(
+                        vae,
+                        prev_img_resized,
+                        plan.tile_size,
+                        plan.tile_overlap,
+                        content_hash,
+                    )[:, :, -1:]
+                previous_latent = {"samples": tail_latent}
                 has_previous_latent = True
                 has_previous_image = False
         else:
@@ -197,24 +331,69 @@ class PainterI2VAdvanced(io.ComfyNode):
         # Convert pixel frames to latent frame index (for standard mode continuity)
         overlap_latent_idx = overlap_frames // 4
 
-        if has_start:
-            start_image = comfy.utils.common_upscale(
-                start_image[:1].movedim(-1, 1), width, height, "bilinear", "center"
-            ).movedim(1, -1)
-            start_latent_cached = vae.encode(start_image[:, :, :, :3])
+        # Standard mode continuation: previous_image[-overlap_frames] and [-1]
+        continuation_picks = {}
+        if not svi_mode and has_previous_image:
+            available_frames = previous_image.shape[0]
+            actual_overlap = min(overlap_frames, available_frames)
+            start_idx = max(0, available_frames - actual_overlap)
+            continuation_picks["prev_start"] = (previous_image, start_idx)
+            if min(overlap_frames, length - 1) > 0:
+                continuation_picks["prev_middle"] = (previous_image, -1)
+
+        # Gather every frame this node needs, resized in one pass
+        encode_anchors = clip_vision is None and clip_vision_model is not None
+        skip_start_pixels = (svi_mode or has_previous_image) and not encode_anchors
+        frames = gather_frames(
+            {
+                # Standard mode without continuation renders start_image
+                "start": (
+                    (start_image, 0)
+                    if has_start
+                    and (cached_reference is None or not skip_start_pixels)
+                    else None
+                ),
+                "end": (end_image, -1) if has_end else None,
+                **continuation_picks,
+            },
+            width,
+            height,
+        )
+        start_image = frames["start"]
+        end_image = frames["end"]
+
+        if cached_reference is not None:
+            # Same start_image as the previous iteration (or none given)
+            start_image_latent_for_ref = cached_reference
+            if has_start:
+                start_latent_cached = cached_reference
+        elif has_start:
+            start_latent_cached = encode_pixels_cached(
+                vae,
+                start_image,
+                plan.anchor_tile_size,
+                plan.tile_overlap,
+                content_hash,
+            ).to(dtype)
             # Always cache for reference_latent (even in continuation mode)
             start_image_latent_for_ref = start_latent_cached
 
         if has_end:
-            end_image = comfy.utils.common_upscale(
-                end_image[-1:].movedim(-1, 1), width, height, "bilinear", "center"
-            ).movedim(1, -1)
-            end_latent_cached = vae.encode(end_image[:, :, :, :3])
+            end_latent_cached = encode_pixels_cached(
+                vae,
+                end_image,
+                plan.anchor_tile_size,
+                plan.tile_overlap,
+                content_hash,
+            ).to(dtype)
 
         # For SVI mode: extract motion_latent from previous_latent (last 1 frame only per SVI 2.0 Pro spec)
         if svi_mode and has_previous_latent:
             prev_samples = previous_latent["samples"]
-            motion_latent = prev_samples[:, :, -1:].clone()
+            motion_latent = prev_samples[:, :, -1:].to(dtype, copy=True)
+            if not tail_key:
+                tail_key = content_key(previous_latent, content_hash)
+                tail_latent = prev_samples[:, :, -1:]
             start_latent_cached = motion_latent.clone()
             has_start = True
 
@@ -232,13 +411,15 @@ class PainterI2VAdvanced(io.ComfyNode):
                 height=height,
                 width=width,
                 device=device,
+                dtype=dtype,
             )
         else:
             concat_high, concat_low = cls._build_standard_mode(
                 vae=vae,
                 start_image=start_image if not has_previous_image else None,
                 end_image=end_image,
-                previous_image=previous_image,
+                prev_start_frame=frames.get("prev_start"),
+                prev_middle_frame=frames.get("prev_middle"),
                 overlap_frames=overlap_frames,
                 has_start=has_start,
                 has_end=has_end,
@@ -247,25 +428,25 @@ class PainterI2VAdvanced(io.ComfyNode):
                 height=height,
                 width=width,
                 device=device,
+                plan=plan,
+                content_hash=content_hash,
             )
 
-        concat_high_original = concat_high.clone()
-
         if motion_amplitude > 1.0:
-            concat_high = apply_motion_amplitude(
+            concat_high = enhance_latent(
                 concat_high,
-                base_frame_idx=0,
                 amplitude=motion_amplitude,
-                protect_brightness=True,
+                base_frame_idx=0,
+                color_protect=color_protect,
+                correct_strength=correct_strength,
+                engine=enhance_engine,
             )
 
-            if color_protect and correct_strength > 0:
-                concat_high = apply_color_protect(
-                    concat_high, concat_high_original, correct_strength
-                )
-
-        mask_high = torch.ones((1, 1, latent_t, H, W), device=device)
-        mask_low = torch.ones((1, 1, latent_t, H, W), device=device)
+        # Masks match the concat latents (the plan's latent dtype)
+        mask_high = torch.ones(
+            (1, 1, latent_t, H, W), device=concat_high.device, dtype=concat_high.dtype
+        )
+        mask_low = torch.ones_like(mask_high)
 
         # Frame 0: hard lock
         if has_start or has_previous_image or has_previous_latent:
@@ -308,6 +489,19 @@ class PainterI2VAdvanced(io.ComfyNode):
                 append=True,
             )
 
+        # Anchors encoded in one batch; a dropped start_image (loop iterations
+        # after the first) falls back to the state's clip_vision
+        if encode_anchors and (start_image is not None or state is None):
+            clip_vision = merge_clip_vision_outputs(
+                *encode_clip_vision(
+                    clip_vision_model,
+                    [start_image, end_image],
+                    content_hash=content_hash,
+                )
+            )
+        if clip_vision is None and state is not None:
+            clip_vision = state.clip_vision
+
         if clip_vision is not None:
             positive_low = node_helpers.conditioning_set_values(
                 positive_low, {"clip_vision_output": clip_vision}
@@ -317,8 +511,25 @@ class PainterI2VAdvanced(io.ComfyNode):
             )
 
         out_latent = {"samples": latent}
+        out_state = SegmentState(
+            width=width,
+            height=height,
+            latent_channels=latent_channels,
+            dtype=dtype,
+            svi_mode=svi_mode,
+            reference_latent=start_image_latent_for_ref,
+            reference_key=reference_key,
+            tail_latent=tail_latent,
+            tail_key=tail_key,
+            clip_vision=clip_vision,
+        )
         return io.NodeOutput(
-            positive_high, negative_high, positive_low, negative_low, out_latent
+            positive_high,
+            negative_high,
+            positive_low,
+            negative_low,
+            out_latent,
+            out_state,
         )
 
     @classmethod
@@ -327,7 +538,8 @@ class PainterI2VAdvanced(io.ComfyNode):
         vae,
         start_image,
         end_image,
-        previous_image,
+        prev_start_frame,
+        prev_middle_frame,
         overlap_frames,
         has_start,
         has_end,
@@ -336,6 +548,8 @@ class PainterI2VAdvanced(io.ComfyNode):
         height,
         width,
         device,
+        plan,
+        content_hash="sampled",
     ):
         """
         Standard mode: Similar to Extend's Continuity mode.
@@ -351,42 +565,48 @@ class PainterI2VAdvanced(io.ComfyNode):
         - Frame -1: end_image (high only)
         - Other frames: grey fill
         """
-        image_high = torch.ones((length, height, width, 3), device=device) * 0.5
-        image_low = torch.ones((length, height, width, 3), device=device) * 0.5
+        clip_high = GreyClip(
+            length, height, width, device=device, dtype=plan.pixel_dtype
+        )
+        clip_low = GreyClip(
+            length, height, width, device=device, dtype=plan.pixel_dtype
+        )
 
         if has_previous_image:
             # Continuation mode: use previous_image frames
-            available_frames = previous_image.shape[0]
-            actual_overlap = min(overlap_frames, available_frames)
-            
             # Start frame: previous_image[-overlap_frames]
-            start_idx = max(0, available_frames - actual_overlap)
-            start_frame = previous_image[start_idx:start_idx+1].clone()
-            start_frame = comfy.utils.common_upscale(
-                start_frame.movedim(-1, 1), width, height, "bilinear", "center"
-            ).movedim(1, -1)
-            image_high[0] = start_frame[0, :, :, :3]
-            image_low[0] = start_frame[0, :, :, :3]
-            
+            clip_high.set_frame(0, prev_start_frame)
+            clip_low.set_frame(0, prev_start_frame)
+
             # Middle frame: previous_image[-1] at position overlap_frames
             middle_idx = min(overlap_frames, length - 1)
             if middle_idx > 0:
-                middle_frame = previous_image[-1:].clone()
-                middle_frame = comfy.utils.common_upscale(
-                    middle_frame.movedim(-1, 1), width, height, "bilinear", "center"
-                ).movedim(1, -1)
-                image_high[middle_idx] = middle_frame[0, :, :, :3]
-                image_low[middle_idx] = middle_frame[0, :, :, :3]
+                clip_high.set_frame(middle_idx, prev_middle_frame)
+                clip_low.set_frame(middle_idx, prev_middle_frame)
         elif start_image is not None:
             # First generation mode: use start_image
-            image_high[0] = start_image[0, :, :, :3]
-            image_low[0] = start_image[0, :, :, :3]
+            clip_high.set_frame(0, start_image)
+            clip_low.set_frame(0, start_image)
 
         if end_image is not None:
-            image_high[-1] = end_image[0, :, :, :3]
-
-        concat_high = vae.encode(image_high)
-        concat_low = vae.encode(image_low)
+            clip_high.set_frame(-1, end_image)
+
+        concat_high = encode_grey_clip_cached(
+            vae,
+            clip_high,
+            plan.chunk_frames,
+            plan.tile_size,
+            plan.tile_overlap,
+            content_hash,
+        ).to(plan.latent_dtype)
+        concat_low = encode_grey_clip_cached(
+            vae,
+            clip_low,
+            plan.chunk_frames,
+            plan.tile_size,
+            plan.tile_overlap,
+            content_hash,
+        ).to(plan.latent_dtype)
 
         return concat_high, concat_low
 
@@ -405,6 +625,7 @@ class PainterI2VAdvanced(io.ComfyNode):
         height,
         width,
         device,
+        dtype=torch.float32,
     ):
         """
         SVI 2.0 Pro mode.
@@ -414,37 +635,22 @@ class PainterI2VAdvanced(io.ComfyNode):
         - motion = last 1 latent frame only (per SVI 2.0 Pro spec)
         - padding = latents_mean (zero-valued latent)
         """
-        concat_high = get_svi_padding_latent(
-            batch_size=1,
-            latent_channels=latent_channels,
-            latent_frames=latent_t,
-            height=height,
-            width=width,
-            spacial_scale=spacial_scale,
-            device=device,
-        )
-        concat_low = get_svi_padding_latent(
-            batch_size=1,
-            latent_channels=latent_channels,
-            latent_frames=latent_t,
-            height=height,
-            width=width,
-            spacial_scale=spacial_scale,
-            device=device,
-        )
+        # Shared padding + overrides; each latent is filled once at the end
+        concat = SVILatent(latent_channels, latent_t, H, W)
 
         # Position 0: anchor_latent
         if start_latent is not None:
-            concat_high[:, :, :1] = start_latent
-            concat_low[:, :, :1] = start_latent
+            concat.set_frame(0, start_latent)
 
         # Position 1: motion_latent (last 1 frame only per SVI 2.0 Pro spec)
         if motion_latent is not None:
-            concat_high[:, :, 1:2] = motion_latent[:, :, -1:]
-            concat_low[:, :, 1:2] = motion_latent[:, :, -1:]
+            concat.set_frame(1, motion_latent[:, :, -1:])
+
+        concat_low = concat.materialize(device, dtype)
 
         # End frame (high noise only)
         if has_end and end_latent is not None:
-            concat_high[:, :, -1:] = end_latent
+            concat.set_frame(-1, end_latent)
+        concat_high = concat.materialize(device, dtype)
 
         return concat_high, concat_low
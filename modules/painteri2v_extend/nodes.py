@@ -11,15 +11,27 @@ SOURCE TRACKING: Based on ComfyUI-PainterLongVideo + Start-Middle Continuity dis
 
 import torch
 import comfy.model_management as mm
-import comfy.utils
 import node_helpers
 from comfy_api.latest import io
 
 from ..common.utils import (
-    apply_motion_amplitude,
-    apply_color_protect,
-    get_svi_padding_latent,
+    SVILatent,
+    parse_amplitudes,
 )
+from ..common.frames import gather_frames
+from ..common.concurrency import DEFAULT_PREP_THREADS, MAX_PREP_THREADS
+from ..common.encode import (
+    GreyClip,
+    decode_frames,
+    decode_tail_frames,
+    encode_grey_clip_cached,
+    encode_pixels_cached,
+    prefetch_grey_clip,
+)
+from ..common.planner import PRECISIONS, plan_execution, log_plan
+from ..common.postprocess import ENGINES, enhance_latent
+from ..common.frame_store import FrameStoreType
+from ..common.cache import CONTENT_HASH_MODES
 
 
 class PainterI2VExtend(io.ComfyNode):
@@ -36,6 +48,9 @@ class PainterI2VExtend(io.ComfyNode):
       - anchor = anchor_image or previous_video[0]
       - motion = previous_video[-overlap_frames:] encoded
       - zero_padding with latents_mean
+
+    previous_latent can replace previous_video: SVI mode then slices latent
+    frames directly (no VAE pass) and continuity mode decodes only the tail.
     """
 
     @classmethod
@@ -77,7 +92,21 @@ class PainterI2VExtend(io.ComfyNode):
                     default=False,
                     tooltip="SVI LoRA mode. Uses anchor + last latent.",
                 ),
-                io.Image.Input("previous_video"),
+                io.Image.Input(
+                    "previous_video",
+                    optional=True,
+                    tooltip="Previous segment frames. Or connect previous_latent.",
+                ),
+                FrameStoreType.Input(
+                    "previous_frames",
+                    optional=True,
+                    tooltip="On-disk frame store. Replaces previous_video, reads frames on demand.",
+                ),
+                io.Latent.Input(
+                    "previous_latent",
+                    optional=True,
+                    tooltip="Previous segment latent. Skips the decode/re-encode round trip.",
+                ),
                 io.Image.Input(
                     "anchor_image",
                     optional=True,
@@ -85,6 +114,68 @@ class PainterI2VExtend(io.ComfyNode):
                 ),
                 io.Image.Input("end_image", optional=True),
                 io.ClipVisionOutput.Input("clip_vision", optional=True),
+                io.Int.Input(
+                    "vae_tile_size",
+                    default=0,
+                    min=0,
+                    max=4096,
+                    step=32,
+                    optional=True,
+                    tooltip="VAE encode tile size for video clips (single frames only when they do not fit). 0 = untiled, with ComfyUI's tiled fallback on OOM.",
+                ),
+                io.Int.Input(
+                    "vae_tile_overlap",
+                    default=64,
+                    min=0,
+                    max=512,
+                    step=16,
+                    optional=True,
+                    tooltip="Overlap between VAE encode tiles.",
+                ),
+                io.Int.Input(
+                    "encode_chunk_frames",
+                    default=0,
+                    min=0,
+                    max=4096,
+                    step=4,
+                    optional=True,
+                    tooltip="Stream the VAE encode in chunks of N frames. 0 = auto.",
+                ),
+                io.Combo.Input(
+                    "precision",
+                    options=list(PRECISIONS),
+                    default="fp32",
+                    optional=True,
+                    tooltip="Conditioning dtype. fp16/bf16 halve the cached conditioning.",
+                ),
+                io.Combo.Input(
+                    "enhance_engine",
+                    options=list(ENGINES),
+                    default="eager",
+                    optional=True,
+                    tooltip="Motion/color enhancement: eager, fused (in place) or compile (torch.compile).",
+                ),
+                io.Combo.Input(
+                    "content_hash",
+                    options=list(CONTENT_HASH_MODES),
+                    default="sampled",
+                    optional=True,
+                    tooltip="Skip work for inputs with unchanged content: sampled hash (single images hashed in full), full hash or off.",
+                ),
+                io.String.Input(
+                    "amplitude_sweep",
+                    default="",
+                    optional=True,
+                    tooltip="Comma-separated motion_amplitude values, e.g. 1.0, 1.1, 1.2. Encodes once and outputs batch_size samples per value (overrides motion_amplitude).",
+                ),
+                io.Int.Input(
+                    "prep_threads",
+                    default=DEFAULT_PREP_THREADS,
+                    min=0,
+                    max=MAX_PREP_THREADS,
+                    optional=True,
+                    tooltip="CPU threads preparing frames while the VAE encodes. 0 = serial.",
+                ),
             ],
             outputs=[
                 io.Conditioning.Output(display_name="positive"),
@@ -103,7 +194,9 @@ class PainterI2VExtend(io.ComfyNode):
         height,
         length,
         batch_size,
-        previous_video,
+        previous_video=None,
+        previous_latent=None,
+        previous_frames=None,
         overlap_frames=4,
         motion_amplitude=1.15,
         color_protect=True,
@@ -111,6 +204,14 @@ class PainterI2VExtend(io.ComfyNode):
         anchor_image=None,
         end_image=None,
         clip_vision=None,
+        vae_tile_size=0,
+        vae_tile_overlap=64,
+        encode_chunk_frames=0,
+        precision="fp32",
+        enhance_engine="eager",
+        content_hash="sampled",
+        amplitude_sweep="",
+        prep_threads=DEFAULT_PREP_THREADS,
     ) -> io.NodeOutput:
         device = mm.intermediate_device()
         spacial_scale = vae.spacial_compression_encode()
@@ -119,55 +220,169 @@ class PainterI2VExtend(io.ComfyNode):
         H = height // spacial_scale
         W = width // spacial_scale
 
+        # Amplitude sweep: one encode, one conditioning sample per amplitude.
+        # The sampler stretches the concat batch over the latent batch, so
+        # amplitude k drives samples [k * batch_size, (k + 1) * batch_size)
+        amplitudes = parse_amplitudes(amplitude_sweep or "")
+        sweep_count = max(1, len(amplitudes))
+
+        # Pick full / tiled / fp16 / chunked execution to fit free memory
+        plan = plan_execution(
+            "PainterI2VExtend",
+            width=width,
+            height=height,
+            length=length,
+            batch_size=batch_size * sweep_count,
+            svi_mode=svi_mode,
+            vae=vae,
+            tile_size=vae_tile_size,
+            tile_overlap=vae_tile_overlap,
+            chunk_frames=encode_chunk_frames,
+            precision=precision,
+        )
+        log_plan(plan)
+        dtype = plan.latent_dtype
+
         # Initialize output latent
         latent = torch.zeros(
-            [batch_size, latent_channels, latent_t, H, W], device=device
+            [batch_size * sweep_count, latent_channels, latent_t, H, W], device=device
         )
 
+        # Continuation source: previous_video (IMAGE), previous_frames (frame
+        # store, indexed like IMAGE) or previous_latent (LATENT)
+        if previous_video is None:
+            previous_video = previous_frames
+        if previous_video is None and previous_latent is None:
+            raise ValueError(
+                "PainterI2VExtend needs previous_video, previous_frames "
+                "or previous_latent."
+            )
+
+        prev_samples = None
+        if previous_video is None:
+            prev_samples = previous_latent["samples"][:1]
+            previous_count = 1 + (prev_samples.shape[2] - 1) * 4
+        else:
+            previous_count = previous_video.shape[0]
+
         # Validate overlap_frames (only used in continuity mode)
-        overlap_frames = min(overlap_frames, previous_video.shape[0] - 1, length - 4)
+        overlap_frames = min(overlap_frames, previous_count - 1, length - 4)
         overlap_frames = max(4, overlap_frames)
 
-        # Preprocess end_image if provided
+        # Latent continuation: use latent frames directly where possible, and
+        # decode only the tail frames that are needed as pixels
+        use_latent = prev_samples is not None and prev_samples.shape[-2:] == (H, W)
+        if prev_samples is not None and not (use_latent and svi_mode):
+            previous_video = decode_tail_frames(vae, prev_samples, overlap_frames)
+
+        # Gather every frame this node needs, resized in one pass
         has_end = end_image is not None
+        anchor_from_latent = anchor_image is None and use_latent
+        anchor_source = anchor_image
+        if anchor_source is None:
+            if prev_samples is None:
+                anchor_source = previous_video
+            elif not use_latent:
+                # Size mismatch: the first frame decodes on its own
+                anchor_source = decode_frames(vae, prev_samples[:, :, :1])
+        if svi_mode:
+            mode_picks = {
+                "last": None if use_latent else (previous_video, -1),
+            }
+        else:
+            mode_picks = {
+                "start": (previous_video, -overlap_frames),
+                "middle": (previous_video, -1),
+            }
+        frames = gather_frames(
+            {
+                "end": (end_image, -1) if has_end else None,
+                # Anchor frame (for reference_latents)
+                "anchor": None if anchor_from_latent else (anchor_source, 0),
+                **mode_picks,
+            },
+            width,
+            height,
+        )
+
+        # Continuity clip renders on the prep pool while the anchors encode
+        # (not at all when its encode is cached)
+        clip = None
+        if not svi_mode:
+            clip = cls._continuity_clip(
+                frames["start"],
+                frames["middle"],
+                overlap_frames,
+                length,
+                height,
+                width,
+                device,
+                plan,
+            )
+            prefetch_grey_clip(
+                vae,
+                clip,
+                plan.chunk_frames,
+                plan.tile_size,
+                plan.tile_overlap,
+                content_hash,
+                prep_threads,
+            )
+
         end_latent_cached = None
         if has_end:
-            end_image_resized = comfy.utils.common_upscale(
-                end_image[-1:].movedim(-1, 1), width, height, "bilinear", "center"
-            ).movedim(1, -1)
-            end_latent_cached = vae.encode(end_image_resized[:, :, :, :3])
-
-        # Get anchor frame (for reference_latents)
-        if anchor_image is not None:
-            anchor_frame = comfy.utils.common_upscale(
-                anchor_image[:1].movedim(-1, 1), width, height, "bilinear", "center"
-            ).movedim(1, -1)
+            end_latent_cached = encode_pixels_cached(
+                vae,
+                frames["end"],
+                plan.anchor_tile_size,
+                plan.tile_overlap,
+                content_hash,
+            ).to(dtype)
+
+        # Anchor latent: previous_latent[0] is the encode of previous_video[0]
+        if anchor_from_latent:
+            anchor_latent = prev_samples[:, :, :1].to(dtype)
         else:
-            anchor_frame = comfy.utils.common_upscale(
-                previous_video[:1].movedim(-1, 1), width, height, "bilinear", "center"
-            ).movedim(1, -1)
+            anchor_latent = encode_pixels_cached(
+                vae,
+                frames["anchor"],
+                plan.anchor_tile_size,
+                plan.tile_overlap,
+                content_hash,
+            ).to(dtype)
 
         if svi_mode:
+            # Motion latent: last latent frame of the previous segment
+            if use_latent:
+                motion_latent = prev_samples[:, :, -1:]
+            else:
+                motion_latent = encode_pixels_cached(
+                    vae,
+                    frames["last"],
+                    plan.anchor_tile_size,
+                    plan.tile_overlap,
+                    content_hash,
+                )
+
             concat_latent, mask = cls._build_svi_mode(
-                vae=vae,
-                previous_video=previous_video,
-                anchor_frame=anchor_frame,
+                anchor_latent=anchor_latent,
+                motion_latent=motion_latent,
                 end_latent_cached=end_latent_cached,
                 has_end=has_end,
                 width=width,
                 height=height,
-                length=length,
                 latent_t=latent_t,
                 latent_channels=latent_channels,
                 spacial_scale=spacial_scale,
                 H=H,
                 W=W,
                 device=device,
+                dtype=dtype,
             )
         else:
             concat_latent, mask = cls._build_continuity_mode(
                 vae=vae,
-                previous_video=previous_video,
+                clip=clip,
                 overlap_frames=overlap_frames,
                 end_latent_cached=end_latent_cached,
                 has_end=has_end,
@@ -177,24 +392,22 @@ class PainterI2VExtend(io.ComfyNode):
                 latent_t=latent_t,
                 H=H,
                 W=W,
-                device=device,
+                plan=plan,
+                content_hash=content_hash,
+                prep_threads=prep_threads,
             )
 
-        # Apply motion_amplitude and color_protect (both modes)
-        concat_latent_original = concat_latent.clone()
-        if motion_amplitude > 1.0:
-            concat_latent = apply_motion_amplitude(
+        # Apply motion_amplitude and color_protect (both modes); a sweep
+        # returns one concat sample per amplitude
+        if amplitudes or motion_amplitude > 1.0:
+            concat_latent = enhance_latent(
                 concat_latent,
+                amplitude=amplitudes or motion_amplitude,
                 base_frame_idx=0,
-                amplitude=motion_amplitude,
-                protect_brightness=True,
+                color_protect=color_protect,
+                engine=enhance_engine,
             )
 
-            if color_protect:
-                concat_latent = apply_color_protect(
-                    concat_latent, concat_latent_original
-                )
-
         # Set conditioning
         positive = node_helpers.conditioning_set_values(
             positive, {"concat_latent_image": concat_latent, "concat_mask": mask}
@@ -203,9 +416,8 @@ class PainterI2VExtend(io.ComfyNode):
             negative, {"concat_latent_image": concat_latent, "concat_mask": mask}
         )
 
-        # Build reference_latents from anchor_frame
-        ref_latent = vae.encode(anchor_frame[:, :, :, :3])
-        ref_latents = [ref_latent]
+        # Build reference_latents from the anchor
+        ref_latents = [anchor_latent]
         if end_latent_cached is not None:
             ref_latents.append(end_latent_cached)
 
@@ -227,11 +439,31 @@ class PainterI2VExtend(io.ComfyNode):
         out_latent = {"samples": latent}
         return io.NodeOutput(positive, negative, out_latent)
 
+    @classmethod
+    def _continuity_clip(
+        cls,
+        start_frame,
+        middle_frame,
+        overlap_frames,
+        length,
+        height,
+        width,
+        device,
+        plan,
+    ):
+        """Gray fill with start frame at 0 and middle frame at overlap_frames."""
+        clip = GreyClip(
+            length, height, width, device=device, dtype=plan.pixel_dtype
+        )
+        clip.set_frame(0, start_frame)
+        clip.set_frame(overlap_frames, middle_frame)
+        return clip
+
     @classmethod
     def _build_continuity_mode(
         cls,
         vae,
-        previous_video,
+        clip,
         overlap_frames,
         end_latent_cached,
         has_end,
@@ -241,7 +473,9 @@ class PainterI2VExtend(io.ComfyNode):
         latent_t,
         H,
         W,
-        device,
+        plan,
+        content_hash="sampled",
+        prep_threads=0,
     ):
         """
         CONTINUITY mode: Start-middle frame linking.
@@ -252,33 +486,27 @@ class PainterI2VExtend(io.ComfyNode):
         """
         middle_idx = overlap_frames
 
-        # Extract start and middle frames
-        start_image = previous_video[-overlap_frames : -overlap_frames + 1].clone()
-        middle_image = previous_video[-1:].clone()
-
-        # Resize to target dimensions
-        start_image = comfy.utils.common_upscale(
-            start_image.movedim(-1, 1), width, height, "bilinear", "center"
-        ).movedim(1, -1)
-
-        middle_image = comfy.utils.common_upscale(
-            middle_image.movedim(-1, 1), width, height, "bilinear", "center"
-        ).movedim(1, -1)
-
-        # Build image tensor: gray fill with start and middle frames
-        image = torch.ones((length, height, width, 3), device=device) * 0.5
-        image[0:1] = start_image[:, :, :, :3].to(device)
-        image[middle_idx : middle_idx + 1] = middle_image[:, :, :, :3].to(device)
-
-        # Encode to latent
-        concat_latent = vae.encode(image)
+        # Encode to latent (clip from _continuity_clip)
+        concat_latent = encode_grey_clip_cached(
+            vae,
+            clip,
+            plan.chunk_frames,
+            plan.tile_size,
+            plan.tile_overlap,
+            content_hash,
+            prep_threads,
+        ).to(plan.latent_dtype)
 
         # Inject end_latent if provided
         if has_end and end_latent_cached is not None:
             concat_latent[:, :, -1:] = end_latent_cached
 
         # Build mask
-        mask = torch.ones((1, 1, latent_t, H, W), device=device)
+        mask = torch.ones(
+            (1, 1, latent_t, H, W),
+            device=concat_latent.device,
+            dtype=concat_latent.dtype,
+        )
 
         # Lock start frame (latent frame 0)
         mask[:, :, 0:1] = 0.0
@@ -299,58 +527,47 @@ class PainterI2VExtend(io.ComfyNode):
     @classmethod
     def _build_svi_mode(
         cls,
-        vae,
-        previous_video,
-        anchor_frame,
+        anchor_latent,
+        motion_latent,
         end_latent_cached,
         has_end,
         width,
         height,
-        length,
         latent_t,
         latent_channels,
         spacial_scale,
         H,
         W,
         device,
+        dtype=torch.float32,
     ):
         """
         SVI 2.0 Pro mode.
 
         concat_latent = [anchor_latent, motion_latent, zero_padding]
-        - anchor = anchor_image or previous_video[0]
+        - anchor = anchor_image or previous_video[0] (previous_latent[0])
         - motion = last 1 latent frame only (per SVI 2.0 Pro spec)
         - padding = latents_mean (zero-valued latent)
         """
-        concat_latent = get_svi_padding_latent(
-            batch_size=1,
-            latent_channels=latent_channels,
-            latent_frames=latent_t,
-            height=height,
-            width=width,
-            spacial_scale=spacial_scale,
-            device=device,
-        )
+        concat = SVILatent(latent_channels, latent_t, H, W)
 
         # Position 0: anchor_latent
-        anchor_latent = vae.encode(anchor_frame[:, :, :, :3])
-        concat_latent[:, :, :1] = anchor_latent
+        concat.set_frame(0, anchor_latent)
 
         # Position 1: motion_latent (last 1 frame only per SVI 2.0 Pro spec)
-        # Encode last frame of previous_video
-        last_frame = previous_video[-1:].clone()
-        last_frame_resized = comfy.utils.common_upscale(
-            last_frame.movedim(-1, 1), width, height, "bilinear", "center"
-        ).movedim(1, -1)
-        motion_latent = vae.encode(last_frame_resized[:, :, :, :3])
-        concat_latent[:, :, 1:2] = motion_latent
+        concat.set_frame(1, motion_latent)
 
         # End frame
         if has_end and end_latent_cached is not None:
-            concat_latent[:, :, -1:] = end_latent_cached
+            concat.set_frame(-1, end_latent_cached)
+        concat_latent = concat.materialize(device, dtype)
 
         # Mask: lock anchor only
-        mask = torch.ones((1, 1, latent_t, H, W), device=device)
+        mask = torch.ones(
+            (1, 1, latent_t, H, W),
+            device=concat_latent.device,
+            dtype=concat_latent.dtype,
+        )
         mask[:, :, :1] = 0.0
 
         if has_end:
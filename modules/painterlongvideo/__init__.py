@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+PainterLongVideo Node
+
+SOURCE TRACKING:
+  - Based on: PainterI2V + PainterI2VExtend + PainterSampler
+  - Last synced: N/A (new node)
+
+MODIFICATIONS:
+  - New node that runs the extend -> sample -> decode loop internally
+  - Streams finished frames to an on-disk frame store
+  - PainterStitchSegments: appends a segment to a frame store with
+    overlap trim or cross-fade
+"""
+
+from .nodes import PainterLongVideo, PainterStitchSegments
+
+__all__ = ["PainterLongVideo", "PainterStitchSegments"]
@@ -0,0 +1,404 @@
+# modules/painterlongvideo/nodes.py
+"""
+PainterLongVideo - Streaming long-video orchestrator
+
+Runs N segments of conditioning -> dual-phase sampling -> VAE decode inside one
+node. Between segments only the overlap tail (pixels or last latent frame) and
+the anchor image are kept in memory; every finished frame is streamed to an
+on-disk frame store, so memory stays flat regardless of total video length.
+
+- Segment 0: PainterI2V from start_image
+- Segment k: PainterI2VExtend from the previous segment's tail
+  (continuity mode: overlap pixel frames, SVI mode: last latent frame)
+"""
+
+import logging
+import os
+
+import comfy.samplers
+import comfy.utils
+import folder_paths
+from comfy_api.latest import io
+
+from ..painteri2v import PainterI2V
+from ..painteri2v_extend import PainterI2VExtend
+from ..paintersampler import PainterSampler
+from ..common.encode import decode_frames
+from ..common.frame_store import (
+    FrameStore,
+    FrameStoreType,
+    FrameStoreWriter,
+    STORE_DTYPES,
+)
+from ..common.stitch import SegmentStitcher
+
+logger = logging.getLogger("ComfyUI-PainterAIO")
+
+
+def new_store_path(filename_prefix: str) -> str:
+    """
+    Create a fresh frame store directory in the output folder.
+
+    Named like ComfyUI's saved images ("<prefix>_00001_"); get_save_image_path()
+    rejects prefixes that resolve outside the output directory. The counter is
+    bumped until the directory is new, so concurrent runs never share a store.
+    """
+    folder, filename, counter, _, _ = folder_paths.get_save_image_path(
+        filename_prefix, folder_paths.get_output_directory()
+    )
+    while True:
+        path = os.path.join(folder, f"{filename}_{counter:05}_")
+        try:
+            os.makedirs(path)
+            return path
+        except FileExistsError:
+            counter += 1
+
+
+def segment_trim(svi_mode: bool, overlap_frames: int) -> int:
+    """
+    Leading frames of a continuation segment that repeat the previous tail.
+
+    - Continuity: frames 0..overlap_frames re-generate previous[-overlap_frames:]
+    - SVI: latent 0 is the anchor, latent 1 the previous last latent (4 frames)
+    """
+    if svi_mode:
+        return 5
+    return overlap_frames + 1
+
+
+def run_segments(
+    segments: int,
+    condition_fn,
+    sample_fn,
+    decode_fn,
+    stitcher: SegmentStitcher,
+    tail_frames: int,
+    on_segment=None,
+):
+    """
+    Run the condition -> sample -> decode loop, streaming frames to `stitcher`.
+
+    The model-facing steps are callables so the loop can be driven by stand-in
+    models (e.g. on CPU):
+
+        condition_fn(index, tail, tail_latent) -> (positive, negative, latent)
+        sample_fn(index, positive, negative, latent) -> latent dict
+        decode_fn(samples) -> IMAGE [T, H, W, C]
+
+    Returns:
+        Last `tail_frames` frames of the final segment
+    """
+    tail = None
+    tail_latent = None
+
+    for index in range(segments):
+        positive, negative, latent = condition_fn(index, tail, tail_latent)
+        sampled = sample_fn(index, positive, negative, latent)
+        frames = decode_fn(sampled["samples"])
+
+        stitcher.append(frames)
+
+        # Keep only what the next segment needs
+        tail = frames[-tail_frames:].clone()
+        tail_latent = sampled["samples"][:1, :, -1:].clone()
+        del frames, sampled, positive, negative, latent
+
+        if on_segment is not None:
+            on_segment(index)
+
+    stitcher.close()
+    return tail
+
+
+class PainterLongVideo(io.ComfyNode):
+    """
+    Long-video node: segment count + conditioning/sampling settings in,
+    on-disk frame store out (a FrameStore handle, accepted by
+    PainterI2VExtend/PainterI2VAdvanced as previous_frames).
+    """
+
+    @classmethod
+    def define_schema(cls) -> io.Schema:
+        return io.Schema(
+            node_id="PainterLongVideo",
+            display_name="Painter Long Video",
+            category="sampling/painter",
+            inputs=[
+                io.Model.Input("high_model"),
+                io.Model.Input("low_model"),
+                io.Conditioning.Input("positive"),
+                io.Conditioning.Input("negative"),
+                io.Vae.Input("vae"),
+                io.Image.Input("start_image"),
+                io.Int.Input("width", default=832, min=16, max=4096, step=16),
+                io.Int.Input("height", default=480, min=16, max=4096, step=16),
+                io.Int.Input("length", default=81, min=9, max=4096, step=4),
+                io.Int.Input("segments", default=4, min=1, max=1000),
+                io.Int.Input(
+                    "overlap_frames",
+                    default=4,
+                    min=4,
+                    max=8,
+                    tooltip="4-8 recommended. Standard mode only.",
+                ),
+                io.Float.Input(
+                    "motion_amplitude",
+                    default=1.15,
+                    min=1.0,
+                    max=2.0,
+                    step=0.05,
+                    tooltip="4-step LoRA fix. 1.1-1.2 normal, 1.2-1.5 fast.",
+                ),
+                io.Boolean.Input(
+                    "color_protect",
+                    default=True,
+                    tooltip="Prevents color drift from motion enhancement.",
+                ),
+                io.Boolean.Input(
+                    "svi_mode",
+                    default=False,
+                    tooltip="SVI LoRA mode. Continues from the last latent frame.",
+                ),
+                io.Int.Input(
+                    "noise_seed",
+                    default=0,
+                    min=0,
+                    max=0xFFFFFFFFFFFFFFFF,
+                    control_after_generate=True,
+                    tooltip="Segment k uses noise_seed + k (wraps around at the maximum).",
+                ),
+                io.Int.Input("steps", default=4, min=1, max=10000),
+                io.Float.Input("high_cfg", default=1.0, min=0.0, max=100.0, step=0.01),
+                io.Float.Input("low_cfg", default=1.0, min=0.0, max=100.0, step=0.01),
+                io.Combo.Input(
+                    "sampler_name", options=comfy.samplers.KSampler.SAMPLERS
+                ),
+                io.Combo.Input("scheduler", options=comfy.samplers.KSampler.SCHEDULERS),
+                io.Int.Input("switch_at_step", default=2, min=1, max=10000),
+                io.Int.Input(
+                    "blend_frames",
+                    default=0,
+                    min=0,
+                    max=9,
+                    tooltip="Frames cross-faded at each seam. 0 = hard cut.",
+                ),
+                io.Combo.Input(
+                    "store_dtype",
+                    options=list(STORE_DTYPES),
+                    default="uint8",
+                    tooltip="uint8 is 4x smaller on disk than float16.",
+                ),
+                io.String.Input("filename_prefix", default="painter_long_video"),
+                io.ClipVisionOutput.Input("clip_vision", optional=True),
+            ],
+            outputs=[
+                FrameStoreType.Output(display_name="frame_store"),
+                io.Image.Output(display_name="last_frames"),
+                io.String.Output(display_name="store_path"),
+            ],
+        )
+
+    @classmethod
+    def execute(
+        cls,
+        high_model,
+        low_model,
+        positive,
+        negative,
+        vae,
+        start_image,
+        width,
+        height,
+        length,
+        segments,
+        overlap_frames,
+        motion_amplitude,
+        color_protect,
+        svi_mode,
+        noise_seed,
+        steps,
+        high_cfg,
+        low_cfg,
+        sampler_name,
+        scheduler,
+        switch_at_step,
+        blend_frames=0,
+        store_dtype="uint8",
+        filename_prefix="painter_long_video",
+        clip_vision=None,
+    ) -> io.NodeOutput:
+        anchor = start_image[:1]
+
+        def condition_fn(index, tail, tail_latent):
+            if index == 0:
+                out = PainterI2V.execute(
+                    positive,
+                    negative,
+                    vae,
+                    width,
+                    height,
+                    length,
+                    1,
+                    motion_amplitude,
+                    start_image=anchor,
+                    clip_vision=clip_vision,
+                    color_protect=color_protect,
+                    svi_mode=svi_mode,
+                )
+            else:
+                previous = (
+                    {"previous_latent": {"samples": tail_latent}}
+                    if svi_mode
+                    else {"previous_video": tail}
+                )
+                out = PainterI2VExtend.execute(
+                    positive,
+                    negative,
+                    vae,
+                    width,
+                    height,
+                    length,
+                    1,
+                    overlap_frames=overlap_frames,
+                    motion_amplitude=motion_amplitude,
+                    color_protect=color_protect,
+                    svi_mode=svi_mode,
+                    anchor_image=anchor,
+                    clip_vision=clip_vision,
+                    **previous,
+                )
+            return out.args
+
+        def sample_fn(index, seg_positive, seg_negative, latent):
+            return PainterSampler.execute(
+                high_model,
+                low_model,
+                "enable",
+                (noise_seed + index) & 0xFFFFFFFFFFFFFFFF,
+                steps,
+                high_cfg,
+                low_cfg,
+                sampler_name,
+                scheduler,
+                seg_positive,
+                seg_negative,
+                latent,
+                0,
+                switch_at_step,
+                steps,
+                "disable",
+            ).args[0]
+
+        store_path = new_store_path(filename_prefix)
+        writer = FrameStoreWriter(store_path, height, width, dtype=store_dtype)
+
+        pbar = comfy.utils.ProgressBar(segments)
+        last_frames = run_segments(
+            segments=segments,
+            condition_fn=condition_fn,
+            sample_fn=sample_fn,
+            decode_fn=lambda samples: decode_frames(vae, samples),
+            stitcher=SegmentStitcher(
+                writer, segment_trim(svi_mode, overlap_frames), blend_frames
+            ),
+            tail_frames=overlap_frames + 1,
+            on_segment=lambda index: pbar.update(1),
+        )
+
+        logger.info(
+            f"Long video: {segments} segments, {writer.frames} frames -> {store_path}"
+        )
+        return io.NodeOutput(FrameStore(store_path), last_frames, store_path)
+
+
+class PainterStitchSegments(io.ComfyNode):
+    """
+    Appends one extension segment to a frame store, trimming or cross-fading
+    the overlap at the seam. Chaining this node replaces concatenating the
+    whole video after every segment.
+    """
+
+    @classmethod
+    def define_schema(cls) -> io.Schema:
+        return io.Schema(
+            node_id="PainterStitchSegments",
+            display_name="Painter Stitch Segments",
+            category="image/video",
+            inputs=[
+                io.Image.Input("segment"),
+                FrameStoreType.Input(
+                    "frame_store",
+                    optional=True,
+                    tooltip="Store to append to. Empty = start a new store.",
+                ),
+                io.Int.Input(
+                    "overlap_frames",
+                    default=4,
+                    min=0,
+                    max=8,
+                    tooltip="overlap_frames used by PainterI2VExtend.",
+                ),
+                io.Boolean.Input(
+                    "svi_mode",
+                    default=False,
+                    tooltip="Segment was generated in SVI mode.",
+                ),
+                io.Int.Input(
+                    "blend_frames",
+                    default=0,
+                    min=0,
+                    max=9,
+                    tooltip="Frames cross-faded at the seam. 0 = hard cut.",
+                ),
+                io.Combo.Input(
+                    "store_dtype",
+                    options=list(STORE_DTYPES),
+                    default="uint8",
+                    tooltip="Format of a new store.",
+                ),
+                io.String.Input("filename_prefix", default="painter_stitched"),
+            ],
+            outputs=[
+                FrameStoreType.Output(display_name="frame_store"),
+                io.String.Output(display_name="store_path"),
+            ],
+        )
+
+    @classmethod
+    def execute(
+        cls,
+        segment,
+        frame_store=None,
+        overlap_frames=4,
+        svi_mode=False,
+        blend_frames=0,
+        store_dtype="uint8",
+        filename_prefix="painter_stitched",
+    ) -> io.NodeOutput:
+        height, width = segment.shape[1], segment.shape[2]
+
+        if frame_store is None:
+            store_path = new_store_path(filename_prefix)
+            writer = FrameStoreWriter(store_path, height, width, dtype=store_dtype)
+        else:
+            if (frame_store.height, frame_store.width) != (height, width):
+                raise ValueError(
+                    f"Segment size {width}x{height} does not match frame store "
+                    f"{frame_store.width}x{frame_store.height}"
+                )
+            # Continue from the handle's snapshot: a re-executed node must not
+            # append after the segment it appended last time
+            store_path = frame_store.path
+            writer = FrameStoreWriter.reopen(store_path, store=frame_store)
+
+        stitcher = SegmentStitcher(
+            writer, segment_trim(svi_mode, overlap_frames), blend_frames
+        )
+        stitcher.append(segment)
+        stitcher.close()
+
+        logger.info(
+            f"Stitched {segment.shape[0]} frames -> {writer.frames} in {store_path}"
+        )
+        return io.NodeOutput(FrameStore(store_path), store_path)
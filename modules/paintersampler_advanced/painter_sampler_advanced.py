@@ -1,12 +1,15 @@
 import torch
 import comfy.sample
 import comfy.samplers
-import comfy.model_management
 import comfy.utils
 import latent_preview
 import logging
 from comfy_api.latest import io
 
+from ..common.noise import prepare_noise_cached
+from ..common.early_exit import EarlyExit
+from ..common.timing import PhaseTimer, SamplingStats, output_stats_path
+
 logger = logging.getLogger("Comfyui-PainterSamplerAdvanced")
 
 
@@ -27,38 +30,50 @@ def common_ksampler(
     force_full_denoise=True,
     callback=None,
     disable_pbar=False,
+    early_exit=None,
 ):
     latent_image = latent["samples"]
     latent_image = comfy.sample.fix_empty_latent_channels(model, latent_image)
     if disable_noise:
         noise = torch.zeros_like(latent_image)
     else:
+        # Same seed/shape reuses the previous draw (cfg/step sweeps)
         batch_inds = latent.get("batch_index", None)
-        noise = comfy.sample.prepare_noise(latent_image, seed, batch_inds)
+        noise = prepare_noise_cached(latent_image, seed, batch_inds)
     noise_mask = latent.get("noise_mask", None)
     if callback is None:
         callback = latent_preview.prepare_callback(model, steps)
     disable_pbar = not comfy.utils.PROGRESS_BAR_ENABLED
-    samples = comfy.sample.sample(
-        model,
-        noise,
-        steps,
-        cfg,
-        sampler_name,
-        scheduler,
-        positive,
-        negative,
-        latent_image,
-        denoise=denoise,
-        disable_noise=disable_noise,
-        start_step=start_step,
-        last_step=last_step,
-        force_full_denoise=force_full_denoise,
-        noise_mask=noise_mask,
-        callback=callback,
-        disable_pbar=disable_pbar,
-        seed=seed,
-    )
+    # Early exit returns x0 as the final latent: fully denoised phases only
+    if early_exit is not None and (not force_full_denoise or noise_mask is not None):
+        early_exit = None
+    if early_exit is not None:
+        early_exit.callback = callback
+        callback = early_exit
+
+    def sample():
+        return comfy.sample.sample(
+            model,
+            noise,
+            steps,
+            cfg,
+            sampler_name,
+            scheduler,
+            positive,
+            negative,
+            latent_image,
+            denoise=denoise,
+            disable_noise=disable_noise,
+            start_step=start_step,
+            last_step=last_step,
+            force_full_denoise=force_full_denoise,
+            noise_mask=noise_mask,
+            callback=callback,
+            disable_pbar=disable_pbar,
+            seed=seed,
+        )
+
+    samples = sample() if early_exit is None else early_exit.sample(sample, model)
     out = latent.copy()
     out["samples"] = samples
     return out
@@ -116,9 +131,33 @@ class PainterSamplerAdvanced(io.ComfyNode):
                     options=["disable", "enable"],
                     default="disable",
                 ),
+                io.Float.Input(
+                    "early_exit_threshold",
+                    default=0.0,
+                    min=0.0,
+                    max=1.0,
+                    step=0.001,
+                    optional=True,
+                    tooltip="Low phase: stop once the denoised latent changes less than this per step (relative L2). 0 = off.",
+                ),
+                io.Int.Input(
+                    "early_exit_patience",
+                    default=1,
+                    min=1,
+                    max=10,
+                    optional=True,
+                    tooltip="Converged steps in a row before stopping early.",
+                ),
+                io.String.Input(
+                    "stats_file",
+                    default="",
+                    optional=True,
+                    tooltip="Append per-phase timing as JSON lines to this file in the output directory. Empty = log only.",
+                ),
             ],
             outputs=[
                 io.Latent.Output(display_name="latent"),
+                io.String.Output(display_name="stats"),
             ],
         )
 
@@ -143,7 +182,12 @@ class PainterSamplerAdvanced(io.ComfyNode):
         switch_at_step,
         end_at_step,
         return_leftover_noise,
+        early_exit_threshold=0.0,
+        early_exit_patience=1,
+        stats_file="",
     ) -> io.NodeOutput:
+        # Rejected before sampling, not after a long run
+        stats_file = output_stats_path(stats_file)
         # 参数标准化
         start_at_step = max(0, start_at_step)
         end_at_step = min(steps, max(start_at_step + 2, end_at_step))
@@ -154,6 +198,16 @@ class PainterSamplerAdvanced(io.ComfyNode):
 
         callback = latent_preview.prepare_callback(high_model, steps)
         disable_pbar = not getattr(comfy.utils, "PROGRESS_BAR_ENABLED", True)
+        stats = SamplingStats(
+            "PainterSamplerAdvanced",
+            shape=list(latent_image["samples"].shape),
+            steps=steps,
+            sampler=sampler_name,
+            scheduler=scheduler,
+            start_at_step=start_at_step,
+            switch_at_step=switch_at_step,
+            end_at_step=end_at_step,
+        )
 
         # 第一阶段：高噪声模型 + 高噪声 conditioning
         if start_at_step < switch_at_step:
@@ -162,6 +216,8 @@ class PainterSamplerAdvanced(io.ComfyNode):
             )
             latent_stage1 = latent_image.copy()
             latent_stage1["samples"] = latent_image["samples"].clone()
+            timer_high = PhaseTimer("high", callback)
+            timer_high.start()
 
             samples_stage1 = common_ksampler(
                 high_model,
@@ -178,9 +234,11 @@ class PainterSamplerAdvanced(io.ComfyNode):
                 start_step=start_at_step,
                 last_step=switch_at_step,
                 force_full_denoise=False,
-                callback=callback,
+                callback=timer_high,
                 disable_pbar=disable_pbar,
             )
+            timer_high.finish()
+            stats.add(timer_high)
             current_latent = samples_stage1
         else:
             current_latent = latent_image
@@ -190,6 +248,11 @@ class PainterSamplerAdvanced(io.ComfyNode):
             f"Phase 2: Low-noise [{switch_at_step}→{end_at_step}]  cfg={low_cfg}"
         )
         callback_low = latent_preview.prepare_callback(low_model, steps)
+        early_exit = None
+        if early_exit_threshold > 0:
+            early_exit = EarlyExit(early_exit_threshold, early_exit_patience)
+        timer_low = PhaseTimer("low", callback_low)
+        timer_low.start()
         samples_final = common_ksampler(
             low_model,
             noise_seed,
@@ -205,8 +268,11 @@ class PainterSamplerAdvanced(io.ComfyNode):
             start_step=switch_at_step,
             last_step=end_at_step,
             force_full_denoise=force_full_denoise,
-            callback=callback_low,
+            callback=timer_low,
             disable_pbar=disable_pbar,
+            early_exit=early_exit,
         )
+        timer_low.finish()
+        stats.add(timer_low, steps_saved=early_exit.steps_saved if early_exit else 0)
 
-        return io.NodeOutput(samples_final)
+        return io.NodeOutput(samples_final, stats.finish(stats_file))
@@ -0,0 +1,88 @@
+# tests/bench_frequency.py
+"""
+Benchmark the frequency separation low-pass engines.
+
+Times extract_low_frequency() with engine="interpolate" (area downscale +
+bilinear upscale) against engine="fft" (rfft2 + cached radial mask) on Wan
+latent shapes, and reports how far apart the two low-pass results are.
+
+Run from a ComfyUI checkout (the node modules import comfy):
+
+    PYTHONPATH=. python custom_nodes/ComfyUI-PainterAIO/tests/bench_frequency.py \
+        [--device cuda] [--dtype bf16]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.common.utils import extract_low_frequency  # noqa: E402
+
+# (label, latent frames, latent height, latent width) of common Wan outputs
+SHAPES = (
+    ("480p x 81", 21, 60, 104),
+    ("720p x 81", 21, 90, 160),
+    ("720p x 161", 41, 90, 160),
+    ("1080p x 81", 21, 135, 240),
+)
+
+DTYPES = {"fp32": torch.float32, "fp16": torch.float16, "bf16": torch.bfloat16}
+
+
+def _sync(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+def time_engine(latent, engine, cutoff, repeat):
+    """Median seconds of one extract_low_frequency() call."""
+    extract_low_frequency(latent, latent.shape[1], engine, cutoff)  # warm-up
+    _sync(latent.device)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_low_frequency(latent, latent.shape[1], engine, cutoff)
+        _sync(latent.device)
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    default_device = "cuda" if torch.cuda.is_available() else "cpu"
+    parser.add_argument("--device", default=default_device)
+    parser.add_argument("--dtype", choices=list(DTYPES), default="fp32")
+    parser.add_argument("--cutoff", type=float, default=0.125)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    print(f"device={device} dtype={args.dtype} cutoff={args.cutoff}")
+    print(
+        f"{'shape':<12} {'interpolate':>12} {'fft':>12} "
+        f"{'speedup':>8} {'rel diff':>9}"
+    )
+    for label, frames, height, width in SHAPES:
+        latent = torch.randn(
+            (1, 16, frames, height, width), device=device, dtype=DTYPES[args.dtype]
+        )
+        interp = time_engine(latent, "interpolate", args.cutoff, args.repeat)
+        fft = time_engine(latent, "fft", args.cutoff, args.repeat)
+
+        low_interp = extract_low_frequency(latent, 16, "interpolate", args.cutoff)
+        low_fft = extract_low_frequency(latent, 16, "fft", args.cutoff)
+        low_interp, low_fft = low_interp.float(), low_fft.float()
+        diff = (low_fft - low_interp).norm() / low_interp.norm()
+        print(
+            f"{label:<12} {interp * 1000:>10.2f}ms {fft * 1000:>10.2f}ms "
+            f"{interp / fft:>7.2f}x {diff.item():>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# tests/bench_hashing.py
+"""
+Benchmark the content hashing behind the encode caches.
+
+Times tensor_fingerprint() in sampled and full mode on IMAGE inputs of common
+sizes (single anchors and videos), i.e. the overhead content_hash adds to
+every node run before a cache lookup can skip a VAE encode. The 1000-frame
+case is a long-video tail (about 4.6GB as float32), where full hashing costs
+most; it needs that much free memory on --device.
+
+Run from a ComfyUI checkout (the node modules import comfy):
+
+    PYTHONPATH=. python custom_nodes/ComfyUI-PainterAIO/tests/bench_hashing.py \\
+        [--device cuda]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.common.cache import tensor_fingerprint  # noqa: E402
+
+# (label, frames, height, width) of IMAGE inputs
+SHAPES = (
+    ("480p image", 1, 480, 832),
+    ("720p image", 1, 720, 1280),
+    ("1080p image", 1, 1080, 1920),
+    ("4K image", 1, 2160, 3840),
+    ("480p x 81", 81, 480, 832),
+    ("720p x 81", 81, 720, 1280),
+    ("480p x 1000", 1000, 480, 832),
+)
+
+
+def time_hash(image, full, repeat):
+    """Median seconds of one tensor_fingerprint() call."""
+    tensor_fingerprint(image, full)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tensor_fingerprint(image, full)
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"device={args.device}")
+    print(f"{'input':<12} {'MB':>8} {'sampled':>10} {'full':>10} {'full GB/s':>10}")
+    for label, frames, height, width in SHAPES:
+        image = torch.rand((frames, height, width, 3), device=args.device)
+        megabytes = image.numel() * image.element_size() / 1024**2
+        sampled = time_hash(image, False, args.repeat)
+        full = time_hash(image, True, args.repeat)
+        print(
+            f"{label:<12} {megabytes:>8.1f} {sampled * 1000:>8.2f}ms "
+            f"{full * 1000:>8.2f}ms {megabytes / 1024 / full:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# tests/bench_overlap.py
+"""
+Benchmark grey clip rendering overlapped with VAE encodes.
+
+Uses a stand-in VAE whose encode() either sleeps (a GPU encode: the calling
+thread waits with the GIL released) or burns CPU (a CPU-bound encode), so the
+overlap can be measured without a model. Two scenarios, each serial
+(prep_threads=0) and overlapped:
+
+- streamed: encode_grey_clip() in temporal chunks; the next chunk renders
+  while the current one encodes
+- prefetch: PainterI2V's order; the full clip renders while the start/end
+  anchors encode
+
+Run from a ComfyUI checkout (the node modules import comfy):
+
+    PYTHONPATH=. python custom_nodes/ComfyUI-PainterAIO/tests/bench_overlap.py \\
+        [--vae burn] [--threads 2]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.common.encode import GreyClip, encode_grey_clip  # noqa: E402
+
+
+class FakeVAE:
+    """
+    VAE stand-in with Wan's 8x spatial / 4x temporal compression.
+
+    Args:
+        mode: "sleep" or "burn"
+        seconds_per_frame: Encode cost per pixel frame
+    """
+
+    latent_channels = 16
+
+    def __init__(self, mode: str, seconds_per_frame: float):
+        self.mode = mode
+        self.seconds_per_frame = seconds_per_frame
+
+    def encode(self, pixels):
+        frames, height, width = pixels.shape[:3]
+        seconds = frames * self.seconds_per_frame
+        if self.mode == "sleep":
+            time.sleep(seconds)
+        else:
+            a = torch.rand(256, 256)
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                a = a @ a
+                a /= a.norm()
+        latent_t = (frames - 1) // 4 + 1
+        return torch.zeros((1, 16, latent_t, height // 8, width // 8))
+
+
+def streamed(vae, args, threads):
+    clip = GreyClip(args.length, args.height, args.width)
+    clip.set_frame(0, torch.rand(args.height, args.width, 3))
+    encode_grey_clip(vae, clip, args.chunk, prep_threads=threads)
+
+
+def prefetch(vae, args, threads):
+    start = torch.rand(1, args.height, args.width, 3)
+    end = torch.rand(1, args.height, args.width, 3)
+    clip = GreyClip(args.length, args.height, args.width)
+    clip.set_frame(0, start)
+    clip.set_frame(-1, end)
+    clip.prefetch(threads)
+    vae.encode(start)
+    vae.encode(end)
+    encode_grey_clip(vae, clip, prep_threads=threads)
+
+
+def best_of(fn, vae, args, threads):
+    samples = []
+    for _ in range(args.repeat):
+        begin = time.perf_counter()
+        fn(vae, args, threads)
+        samples.append(time.perf_counter() - begin)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vae", choices=("sleep", "burn"), default="sleep")
+    parser.add_argument("--seconds-per-frame", type=float, default=0.004)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--length", type=int, default=161)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--chunk", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    vae = FakeVAE(args.vae, args.seconds_per_frame)
+    print(
+        f"vae={args.vae} {args.seconds_per_frame * 1000:.1f}ms/frame, "
+        f"{args.length} frames {args.width}x{args.height}, chunk {args.chunk}"
+    )
+    threads = f"{args.threads} threads"
+    print(f"{'scenario':<10} {'serial':>10} {threads:>12} {'speedup':>8}")
+    for name, fn in (("streamed", streamed), ("prefetch", prefetch)):
+        serial = best_of(fn, vae, args, 0)
+        overlapped = best_of(fn, vae, args, args.threads)
+        print(
+            f"{name:<10} {serial:>9.3f}s {overlapped:>11.3f}s "
+            f"{serial / overlapped:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
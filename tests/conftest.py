@@ -0,0 +1,19 @@
+# tests/conftest.py
+"""
+Test setup for PainterAIO.
+
+The node modules import torch and ComfyUI (comfy, comfy_api, folder_paths), so
+the tests run from a ComfyUI checkout, e.g.
+
+    cd ComfyUI && python -m pytest custom_nodes/ComfyUI-PainterAIO/tests
+
+and skip themselves when those imports are unavailable. The repository root
+is put on sys.path so the node modules import as `modules`.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
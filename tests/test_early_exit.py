@@ -0,0 +1,93 @@
+# tests/test_early_exit.py
+"""EarlyExit against a stand-in sampler with a known x0 convergence curve."""
+
+import importlib.util
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Loaded as a standalone module: the convergence logic only needs torch
+_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "modules",
+    "common",
+    "early_exit.py",
+)
+_spec = importlib.util.spec_from_file_location("painter_early_exit", _PATH)
+early_exit = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(early_exit)
+EarlyExit = early_exit.EarlyExit
+
+# x0 per step; relative change to the previous step at steps 1..5:
+# 0.25, 0.167, 0.04, 0.0083, 0.00084
+CURVE = [2.0, 1.5, 1.25, 1.2, 1.19, 1.189, 1.1889, 1.18889, 1.188889, 1.1888889]
+TOTAL = len(CURVE)
+
+
+def _sampler(callback, curve=CURVE):
+    """Stand-in for comfy.sample.sample(): reports x0 = curve[step]."""
+
+    def sample():
+        x = torch.zeros(1, 4, 2, 3, 3)
+        for step, value in enumerate(curve):
+            x0 = torch.full_like(x, value)
+            callback(step, x0, x, len(curve))
+        return torch.full_like(x, -1.0)
+
+    return sample
+
+
+class _StandInModel:
+    """Model patcher stand-in: model.model.process_latent_out()."""
+
+    class model:
+        @staticmethod
+        def process_latent_out(latent):
+            return latent * 10
+
+
+@pytest.mark.parametrize(
+    "threshold, patience, steps_run",
+    [
+        (0.01, 1, 5),  # first change below 1%: step 4 (0.0083)
+        (0.01, 2, 6),  # two in a row: steps 4 and 5
+        (0.05, 1, 4),  # 0.04 at step 3
+        (0.001, 1, 6),  # 0.00084 at step 5
+        (0.0, 1, TOTAL),  # nothing is below 0: runs to the end
+    ],
+)
+def test_exit_step(threshold, patience, steps_run):
+    stop = EarlyExit(threshold, patience)
+    try:
+        _sampler(stop)()
+        exited = False
+    except early_exit._Converged:
+        exited = True
+    assert stop.steps_run == steps_run
+    assert exited == (steps_run < TOTAL)
+    assert stop.steps_saved == TOTAL - steps_run
+
+
+def test_callback_forwarded_every_run_step():
+    seen = []
+    stop = EarlyExit(0.01, 1, callback=lambda step, *_: seen.append(step))
+    with pytest.raises(early_exit._Converged):
+        _sampler(stop)()
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_sample_returns_converged_x0():
+    pytest.importorskip("comfy")
+    stop = EarlyExit(0.01, 2)
+    samples = stop.sample(_sampler(stop), _StandInModel())
+    # x0 of the last step run, taken out of latent space
+    assert torch.allclose(samples, torch.full_like(samples, CURVE[5] * 10))
+
+
+def test_sample_without_convergence_returns_sampler_output():
+    stop = EarlyExit(0.0, 1)
+    samples = stop.sample(_sampler(stop), _StandInModel())
+    assert torch.equal(samples, torch.full_like(samples, -1.0))
+    assert stop.steps_saved == 0
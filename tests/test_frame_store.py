@@ -0,0 +1,188 @@
+# tests/test_frame_store.py
+"""FrameStoreWriter flushing / reopening and FrameStore memory-mapped reads."""
+
+import json
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+pytest.importorskip("comfy")
+
+from modules.common.frame_store import (  # noqa: E402
+    INDEX_NAME,
+    FrameStore,
+    FrameStoreWriter,
+)
+
+SIZE = 4
+
+
+def _frames(start, count):
+    """IMAGE frames whose value is their index (exact in uint8)."""
+    values = torch.arange(start, start + count, dtype=torch.float32) / 255.0
+    return values.view(-1, 1, 1, 1).expand(count, SIZE, SIZE, 3).clone()
+
+
+def _values(frames):
+    return (frames[:, 0, 0, 0] * 255.0).round().long().tolist()
+
+
+def _index(path):
+    with open(os.path.join(path, INDEX_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_flush_writes_full_shards_lazily(tmp_path):
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=4)
+    writer.append(_frames(0, 4))
+    # A full buffer is only flushed once more frames arrive
+    assert writer.shards == [] and writer.total_frames == 4
+
+    writer.append(_frames(4, 6))
+    assert [shard["count"] for shard in writer.shards] == [4, 4]
+    assert writer.frames == 8 and writer.total_frames == 10
+    assert _index(str(tmp_path))["frames"] == 8
+
+    writer.close()
+    index = _index(str(tmp_path))
+    assert index["frames"] == 10
+    assert [shard["start"] for shard in index["shards"]] == [0, 4, 8]
+    assert all(os.path.exists(tmp_path / shard["file"]) for shard in index["shards"])
+
+
+@pytest.mark.parametrize("dtype", ["uint8", "float16"])
+def test_reads_match_appended_frames(tmp_path, dtype):
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, dtype=dtype, shard_frames=4)
+    writer.append(_frames(0, 11))
+    writer.close()
+
+    store = FrameStore(str(tmp_path))
+    assert store.shape == (11, SIZE, SIZE, 3) and len(store) == 11
+    assert _values(store[:]) == list(range(11))
+    assert _values(store[3:9]) == list(range(3, 9))
+    assert _values(store[::3]) == [0, 3, 6, 9]
+    assert _values(store[-2:]) == [9, 10]
+    assert _values(store[-1][None]) == [10]
+    assert store[2:4, :, :, :1].shape == (2, SIZE, SIZE, 1)
+    with pytest.raises(IndexError):
+        store[11]
+
+
+def test_reads_are_memory_mapped(tmp_path):
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=4)
+    writer.append(_frames(0, 8))
+    writer.close()
+
+    store = FrameStore(str(tmp_path))
+    assert store._maps == {}
+    frames = store.raw(5, 7)
+    # Only the shard holding the frames is mapped, and the read is a view of it
+    assert list(store._maps) == [1]
+    assert isinstance(store._maps[1], np.memmap)
+    assert frames.data_ptr() == store._maps[1][1:3].ctypes.data
+
+    # Copy-on-write map: writing to the view never reaches the file
+    frames.fill_(0)
+    assert _values(FrameStore(str(tmp_path))[5:7]) == [5, 6]
+
+
+def test_reopen_appends_after_last_frame(tmp_path):
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=4)
+    writer.append(_frames(0, 6))
+    writer.close()
+
+    writer = FrameStoreWriter.reopen(str(tmp_path), shard_frames=4)
+    assert writer.total_frames == 6
+    writer.append(_frames(6, 5))
+    writer.close()
+
+    assert _values(FrameStore(str(tmp_path))[:]) == list(range(11))
+
+
+def test_reopen_continues_from_handle(tmp_path):
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=4)
+    writer.append(_frames(0, 5))
+    writer.close()
+    handle = FrameStore(str(tmp_path))
+
+    writer = FrameStoreWriter.reopen(str(tmp_path), shard_frames=4)
+    writer.append(_frames(5, 5))
+    writer.close()
+    later = FrameStore(str(tmp_path))
+
+    # Re-executing from the older handle drops what was appended after it
+    writer = FrameStoreWriter.reopen(str(tmp_path), shard_frames=4, store=handle)
+    assert writer.total_frames == 5
+    writer.append(_frames(5, 2))
+    writer.close()
+
+    store = FrameStore(str(tmp_path))
+    assert store.frames == 7 and store.version == later.version + 1
+    assert _values(store[:]) == list(range(7))
+
+    # The later handle still reads the untouched frames, not the dropped ones
+    assert _values(later[:4]) == [0, 1, 2, 3]
+    with pytest.raises(RuntimeError):
+        later[5:]
+    with pytest.raises(RuntimeError):
+        FrameStoreWriter.reopen(str(tmp_path), store=later)
+
+
+def test_pop_tail_returns_frames_across_shards(tmp_path):
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=4)
+    writer.append(_frames(0, 10))
+
+    tail = writer.pop_tail(7)
+    assert _values(tail) == list(range(3, 10))
+    assert writer.total_frames == 3
+    writer.close()
+
+    assert _values(FrameStore(str(tmp_path))[:]) == [0, 1, 2]
+
+
+def test_pop_tail_is_copy_on_write(tmp_path):
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=4)
+    writer.append(_frames(0, 10))
+    writer.close()
+    before = {
+        shard["file"]: (tmp_path / shard["file"]).read_bytes()
+        for shard in _index(str(tmp_path))["shards"]
+    }
+    handle = FrameStore(str(tmp_path))
+
+    writer = FrameStoreWriter.reopen(str(tmp_path), shard_frames=4)
+    assert _values(writer.pop_tail(4)) == [6, 7, 8, 9]
+    assert _values(writer.pop_tail(0)) == []
+
+    index = _index(str(tmp_path))
+    assert index["version"] == handle.version + 1 and index["frames"] == 6
+    assert [shard["count"] for shard in index["shards"]] == [4, 2]
+    # Surviving files are unchanged; the kept frames went to a new file
+    for shard in index["shards"]:
+        data = (tmp_path / shard["file"]).read_bytes()
+        assert before.get(shard["file"], data) == data
+    assert index["shards"][1]["file"] not in before
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [INDEX_NAME] + [shard["file"] for shard in index["shards"]]
+    )
+
+    # The old handle fails loudly on rewritten frames, not with stale data
+    assert _values(handle[:4]) == [0, 1, 2, 3]
+    with pytest.raises(RuntimeError):
+        handle[4]
+    assert _values(FrameStore(str(tmp_path))[:]) == list(range(6))
+
+
+@pytest.mark.skipif(os.name == "nt", reason="mapped files cannot be removed")
+def test_mapped_shard_survives_rewrite(tmp_path):
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=4)
+    writer.append(_frames(0, 8))
+    writer.close()
+    handle = FrameStore(str(tmp_path))
+    assert _values(handle[4:8]) == [4, 5, 6, 7]
+
+    FrameStoreWriter.reopen(str(tmp_path), shard_frames=4).pop_tail(3)
+    # Already mapped: the removed file stays readable through the map
+    assert _values(handle[4:8]) == [4, 5, 6, 7]
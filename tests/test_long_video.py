@@ -0,0 +1,114 @@
+# tests/test_long_video.py
+"""run_segments() driven by stand-in condition / sample / decode callables."""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("comfy")
+
+from modules.common.frame_store import FrameStore, FrameStoreWriter  # noqa: E402
+from modules.common.stitch import SegmentStitcher  # noqa: E402
+from modules.painterlongvideo.nodes import run_segments, segment_trim  # noqa: E402
+
+LENGTH = 17
+SIZE = 8
+LATENT_T = (LENGTH - 1) // 4 + 1
+
+
+class FakeModels:
+    """
+    Stand-in conditioning, sampler and VAE.
+
+    Segment k decodes to frames whose value is their index in the final video
+    (k * (LENGTH - trim) + i), so a correctly trimmed store reads 0, 1, 2, ...
+    Every tail handed back to condition_fn is recorded.
+    """
+
+    def __init__(self, trim):
+        self.trim = trim
+        self.tails = []
+        self.tail_latents = []
+
+    def condition(self, index, tail, tail_latent):
+        self.tails.append(tail)
+        self.tail_latents.append(tail_latent)
+        latent = torch.full((1, 16, LATENT_T, SIZE // 8, SIZE // 8), float(index))
+        return "positive", "negative", {"samples": latent}
+
+    def sample(self, index, positive, negative, latent):
+        return {"samples": latent["samples"] + 0.5}
+
+    def decode(self, samples):
+        index = int(samples[0, 0, 0, 0, 0])
+        start = index * (LENGTH - self.trim)
+        values = torch.arange(start, start + LENGTH, dtype=torch.float32) / 255.0
+        return values.view(-1, 1, 1, 1).expand(LENGTH, SIZE, SIZE, 3).clone()
+
+
+def _frame_values(store):
+    return (store[:][:, 0, 0, 0] * 255.0).round().long().tolist()
+
+
+@pytest.mark.parametrize(
+    "svi_mode, overlap_frames, expected_trim",
+    [(True, 8, 5), (False, 8, 9), (False, 4, 5)],
+)
+def test_segment_trim(svi_mode, overlap_frames, expected_trim):
+    assert segment_trim(svi_mode, overlap_frames) == expected_trim
+
+
+@pytest.mark.parametrize("svi_mode", [True, False])
+def test_run_segments_frame_count_and_trim(tmp_path, svi_mode):
+    segments = 3
+    trim = segment_trim(svi_mode, overlap_frames=8)
+    models = FakeModels(trim)
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=8)
+
+    run_segments(
+        segments=segments,
+        condition_fn=models.condition,
+        sample_fn=models.sample,
+        decode_fn=models.decode,
+        stitcher=SegmentStitcher(writer, trim),
+        tail_frames=9,
+    )
+
+    store = FrameStore(str(tmp_path))
+    total = LENGTH + (segments - 1) * (LENGTH - trim)
+    assert store.frames == total
+    # Repeated leading frames of each continuation are dropped at the seam
+    assert _frame_values(store) == list(range(total))
+
+
+def test_run_segments_keeps_only_the_tail(tmp_path):
+    trim = segment_trim(False, overlap_frames=8)
+    tail_frames = 9
+    models = FakeModels(trim)
+    writer = FrameStoreWriter(str(tmp_path), SIZE, SIZE, shard_frames=8)
+
+    last = run_segments(
+        segments=3,
+        condition_fn=models.condition,
+        sample_fn=models.sample,
+        decode_fn=models.decode,
+        stitcher=SegmentStitcher(writer, trim),
+        tail_frames=tail_frames,
+    )
+
+    assert models.tails[0] is None and models.tail_latents[0] is None
+    for index in (1, 2):
+        tail = models.tails[index]
+        start = (index - 1) * (LENGTH - trim) + LENGTH - tail_frames
+        assert tail.shape == (tail_frames, SIZE, SIZE, 3)
+        # A private copy, not a view keeping the decoded segment alive
+        assert tail._base is None
+        values = (tail[:, 0, 0, 0] * 255.0).round().long().tolist()
+        assert values == list(range(start, start + tail_frames))
+
+        tail_latent = models.tail_latents[index]
+        assert tail_latent.shape == (1, 16, 1, SIZE // 8, SIZE // 8)
+        assert tail_latent._base is None
+        assert float(tail_latent.flatten()[0]) == index - 1 + 0.5
+
+    assert last.shape == (tail_frames, SIZE, SIZE, 3)
+    assert torch.equal(last, FrameStore(str(tmp_path))[-tail_frames:])
@@ -0,0 +1,42 @@
+# tests/test_noise.py
+"""prepare_noise_cached(): identical noise and RNG state on hits and misses."""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("comfy")
+
+from modules.common import noise as noise_cache  # noqa: E402
+from modules.common.noise import prepare_noise_cached  # noqa: E402
+
+SHAPE = (1, 16, 3, 8, 8)
+
+
+@pytest.mark.parametrize("batch_inds", [None, [0]])
+def test_hit_restores_rng_state(batch_inds):
+    noise_cache._noise_cache.clear()
+    latent = torch.zeros(SHAPE)
+
+    first = prepare_noise_cached(latent, 42, batch_inds)
+    after_miss = torch.get_rng_state()
+    next_miss = torch.randn(16)
+
+    # Move the global RNG elsewhere, as sampling the first run would
+    torch.manual_seed(7)
+    torch.rand(1000)
+
+    hits = noise_cache._noise_cache.hits
+    second = prepare_noise_cached(latent, 42, batch_inds)
+    assert noise_cache._noise_cache.hits == hits + 1
+    assert torch.equal(first, second)
+    assert torch.equal(torch.get_rng_state(), after_miss)
+    # Ancestral samplers drawing from the global RNG see the same values
+    assert torch.equal(torch.randn(16), next_miss)
+
+
+def test_hit_returns_private_copy():
+    noise_cache._noise_cache.clear()
+    latent = torch.zeros(SHAPE)
+    first = prepare_noise_cached(latent, 3)
+    first.add_(1.0)
+    assert not torch.equal(prepare_noise_cached(latent, 3), first)
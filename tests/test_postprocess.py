@@ -0,0 +1,97 @@
+# tests/test_postprocess.py
+"""fused / compile engines of enhance_latent() against the eager reference."""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("comfy")
+
+from modules.common import postprocess  # noqa: E402
+from modules.common.postprocess import enhance_latent  # noqa: E402
+from modules.common.utils import parse_amplitudes  # noqa: E402
+
+SHAPE = (1, 16, 5, 16, 16)
+
+
+def _latents(seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    latent = torch.randn(SHAPE, generator=generator)
+    baseline = torch.randn(SHAPE, generator=generator)
+    start = torch.randn((1, 16, 1, 16, 16), generator=generator)
+    end = torch.randn((1, 16, 1, 16, 16), generator=generator)
+    return latent, baseline, (start, end)
+
+
+CASES = {
+    "amplitude": dict(amplitude=1.3),
+    "amplitude_end_anchor": dict(amplitude=1.3, base_frame_idx=-1),
+    "amplitude_no_protect": dict(amplitude=1.3, protect_brightness=False),
+    "frequency": dict(baseline="full", boost_scale=2.0),
+    "frequency_fft": dict(baseline="full", boost_scale=2.0, freq_engine="fft"),
+    "frequency_linear": dict(baseline="linear", boost_scale=2.0),
+    "color": dict(amplitude=1.3, color_protect=True, correct_strength=0.5),
+    "chain": dict(
+        amplitude=1.2, baseline="full", boost_scale=1.5, color_protect=True
+    ),
+    "sweep_amplitude": dict(amplitude=[1.0, 1.15, 1.3], color_protect=True),
+    "sweep_boost": dict(baseline="linear", boost_scale=[0.0, 1.0, 2.0]),
+    "sweep_chain": dict(
+        amplitude=[1.0, 1.2, 1.4], baseline="full", boost_scale=[0.0, 1.0, 2.0]
+    ),
+    # Samples whose amplitude / boost is below the stage threshold stay as-is
+    "sweep_gates": dict(
+        amplitude=[0.8, 1.0, 1.3], baseline="full", boost_scale=[0.0005, 0.0, 2.0]
+    ),
+}
+
+
+def _run(case, engine):
+    latent, baseline, pair = _latents()
+    params = dict(CASES[case])
+    if "baseline" in params:
+        params["baseline"] = baseline if params["baseline"] == "full" else pair
+    return enhance_latent(latent, engine=engine, **params)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_fused_matches_eager(case):
+    expected = _run(case, "eager")
+    result = _run(case, "fused")
+    assert result.shape == expected.shape
+    torch.testing.assert_close(result, expected, atol=1e-4, rtol=1e-4)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_compile_matches_eager(case):
+    if not hasattr(torch, "compile"):
+        pytest.skip("torch.compile unavailable")
+    postprocess._compiled = None
+    expected = _run(case, "eager")
+    result = _run(case, "compile")
+    if postprocess._compiled is False:
+        pytest.skip("torch.compile (inductor) failed on this host")
+    assert result.shape == expected.shape
+    torch.testing.assert_close(result, expected, atol=1e-4, rtol=1e-4)
+
+
+def test_input_not_modified():
+    latent, baseline, _ = _latents()
+    before = latent.clone()
+    for engine in ("eager", "fused"):
+        enhance_latent(
+            latent,
+            amplitude=[1.0, 1.3],
+            baseline=baseline,
+            boost_scale=1.0,
+            color_protect=True,
+            engine=engine,
+        )
+    assert torch.equal(latent, before)
+
+
+def test_parse_amplitudes():
+    assert parse_amplitudes("") == []
+    assert parse_amplitudes("1.0, 1.1 1.2") == [1.0, 1.1, 1.2]
+    for text in ("1.1, fast", "0.9", "2.5", "nan"):
+        with pytest.raises(ValueError):
+            parse_amplitudes(text)
@@ -0,0 +1,137 @@
+# tests/test_shm_cache.py
+"""SharedLatentCache across worker processes, and vae_identity()."""
+
+import gc
+import multiprocessing
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("comfy")
+
+from modules.common import shm_cache  # noqa: E402
+from modules.common.cache import TensorLRUCache  # noqa: E402
+from modules.common.shm_cache import SharedLatentCache, vae_identity  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    shm_cache.fcntl is None, reason="shared cache needs fcntl"
+)
+
+SHAPE = (1, 16, 3, 8, 8)
+ENTRY_BYTES = 16 * 3 * 8 * 8 * 4
+
+
+def _latent(seed):
+    return torch.randn(SHAPE, generator=torch.Generator().manual_seed(seed))
+
+
+def _run(target, *args, processes=1):
+    """Run `target(*args, rank)` in fresh worker processes; returns exit codes."""
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=target, args=(*args, rank)) for rank in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    return [worker.exitcode for worker in workers]
+
+
+def _publish(root, rank):
+    SharedLatentCache(root).put(("latent", rank), _latent(rank))
+
+
+def _check(root, rank):
+    cache = SharedLatentCache(root)
+    latent = cache.get(("latent", rank))
+    if latent is None or not torch.equal(latent, _latent(rank)):
+        raise SystemExit(1)
+    # Copy-on-write: writes stay private to this process
+    latent.add_(1.0)
+
+
+def _publish_many(root, max_bytes, count, rank):
+    cache = SharedLatentCache(root, max_bytes)
+    for i in range(count):
+        key = ("latent", rank, i)
+        cache.put(key, _latent(rank * count + i))
+        cache.get(key)
+
+
+def test_other_process_reads_entry(tmp_path):
+    root = str(tmp_path)
+    assert _run(_publish, root) == [0]
+    assert _run(_check, root) == [0]
+    # The writes of the reader did not reach the file
+    latent = SharedLatentCache(root).get(("latent", 0))
+    assert torch.equal(latent, _latent(0))
+
+
+def test_bfloat16_round_trip(tmp_path):
+    cache = SharedLatentCache(str(tmp_path))
+    latent = _latent(1).to(torch.bfloat16)
+    cache.put("bf16", latent)
+    shared = cache.get("bf16")
+    assert shared.dtype == torch.bfloat16
+    assert torch.equal(shared, latent)
+
+
+def test_concurrent_writers_respect_budget(tmp_path):
+    root = str(tmp_path)
+    max_bytes = 6 * ENTRY_BYTES
+    codes = _run(_publish_many, root, max_bytes, 8, processes=4)
+    assert codes == [0, 0, 0, 0]
+
+    cache = SharedLatentCache(root, max_bytes)
+    with cache._locked_index() as index:
+        entries = dict(index)
+    assert 0 < len(entries) <= 6
+    assert sum(entry["bytes"] for entry in entries.values()) <= max_bytes
+    files = {path for path in tmp_path.iterdir() if path.suffix == ".bin"}
+    assert {tmp_path / f"{name}.bin" for name in entries} == files
+
+
+class _StubVAE:
+    latent_channels = 16
+
+    def __init__(self, seed):
+        torch.manual_seed(seed)
+        self.first_stage_model = torch.nn.Sequential(
+            torch.nn.Linear(8, 8), torch.nn.Linear(8, 8), torch.nn.Linear(8, 8)
+        )
+
+
+def test_vae_identity_in_process_is_per_object(monkeypatch):
+    monkeypatch.setattr(shm_cache, "shared_cache", lambda: None)
+    first, same = _StubVAE(0), _StubVAE(0)
+    assert vae_identity(first) == vae_identity(first)
+    # No weights are hashed: equal weights in another object get another key
+    assert vae_identity(first) != vae_identity(same)
+
+
+def test_vae_identity_released_with_vae(monkeypatch):
+    monkeypatch.setattr(shm_cache, "shared_cache", lambda: None)
+    vae = _StubVAE(0)
+    identity = vae_identity(vae)
+    cache = TensorLRUCache(1024**2)
+    cache.put((identity, 64, 64), _latent(0))
+    cache.put(("other", 64, 64), _latent(1))
+
+    del vae
+    gc.collect()
+    assert cache.get((identity, 64, 64)) is None
+    assert cache.get(("other", 64, 64)) is not None
+    assert cache.bytes == ENTRY_BYTES
+
+
+def test_vae_identity_shared_covers_every_weight(monkeypatch):
+    monkeypatch.setattr(shm_cache, "shared_cache", lambda: object())
+    first, same = _StubVAE(0), _StubVAE(0)
+    assert vae_identity(first) == vae_identity(same)
+
+    # A change in a middle layer only (first and last weights untouched)
+    changed = _StubVAE(0)
+    with torch.no_grad():
+        changed.first_stage_model[1].weight[3, 5] += 1e-3
+    assert vae_identity(changed) != vae_identity(first)
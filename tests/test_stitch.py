@@ -0,0 +1,69 @@
+# tests/test_stitch.py
+"""SegmentStitcher seams: trimmed overlap and cross-faded blends."""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("comfy")
+
+from modules.common.frame_store import FrameStore, FrameStoreWriter  # noqa: E402
+from modules.common.stitch import SegmentStitcher, crossfade_weights  # noqa: E402
+
+SIZE = 4
+
+
+def _frames(values):
+    values = torch.tensor(values, dtype=torch.float32)
+    return values.view(-1, 1, 1, 1).expand(len(values), SIZE, SIZE, 3).clone()
+
+
+def _stitch(path, segments, trim, blend_frames=0, shard_frames=4):
+    writer = FrameStoreWriter(
+        str(path), SIZE, SIZE, dtype="float16", shard_frames=shard_frames
+    )
+    stitcher = SegmentStitcher(writer, trim, blend_frames)
+    for segment in segments:
+        stitcher.append(segment)
+    stitcher.close()
+    return FrameStore(str(path))[:][:, 0, 0, 0]
+
+
+def test_crossfade_weights():
+    weights = crossfade_weights(3).flatten().tolist()
+    assert weights == pytest.approx([0.25, 0.5, 0.75])
+
+
+def test_trim_drops_repeated_frames(tmp_path):
+    first = _frames([0.0, 0.1, 0.2, 0.3, 0.4])
+    # new[trim - 1] repeats the last stored frame
+    second = _frames([0.2, 0.3, 0.4, 0.5, 0.6])
+    frames = _stitch(tmp_path, [first, second], trim=3)
+    assert frames.tolist() == pytest.approx(
+        [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6], abs=1e-3
+    )
+
+
+@pytest.mark.parametrize("shard_frames", [2, 4, 64])
+def test_crossfade_blends_the_seam(tmp_path, shard_frames):
+    first = _frames([0.0, 0.0, 0.0, 0.0, 0.0])
+    second = _frames([1.0, 1.0, 1.0, 1.0, 1.0])
+    frames = _stitch(
+        tmp_path, [first, second], trim=3, blend_frames=2, shard_frames=shard_frames
+    )
+    # The last two stored frames fade towards the new segment, then a clean cut
+    expected = [0.0, 0.0, 0.0, 1 / 3, 2 / 3, 1.0, 1.0]
+    assert frames.tolist() == pytest.approx(expected, abs=1e-3)
+
+
+def test_blend_is_clamped_to_trim(tmp_path):
+    first = _frames([0.0, 0.0, 0.0])
+    second = _frames([1.0, 1.0, 1.0])
+    stitcher = SegmentStitcher(
+        FrameStoreWriter(str(tmp_path), SIZE, SIZE), trim=1, blend_frames=4
+    )
+    assert stitcher.blend_frames == 1
+    stitcher.append(first)
+    stitcher.append(second)
+    stitcher.close()
+    frames = FrameStore(str(tmp_path))[:][:, 0, 0, 0]
+    assert frames.tolist() == pytest.approx([0.0, 0.0, 0.5, 1.0, 1.0], abs=1e-2)